@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import string
+from collections import namedtuple
+from datetime import datetime
+
+import db
+import passwords
+from cache import TTLCache
+
+PROFILE_COLUMNS = 'id, username, gender, chatbot_name, chatbot_gender'
+UserProfile = namedtuple('UserProfile', ['id', 'username', 'gender', 'chatbot_name', 'chatbot_gender'])
+
+# Profiles keyed by username; writes to a user's row must call invalidate_profile
+_profiles = TTLCache(maxsize=int(os.getenv("PROFILE_CACHE_SIZE", "1024")),
+                     ttl=float(os.getenv("PROFILE_CACHE_TTL", "300")))
+
+
+def _write_logins(conn, rows):
+    # Repeated logins by one user within a flush collapse to a single UPDATE with the latest time
+    latest = dict(rows)
+    conn.executemany('UPDATE users SET last_login = ? WHERE id = ?',
+                     [(logged_in_at, user_id) for user_id, logged_in_at in latest.items()])
+
+
+# last_login is written behind the login request, so logging in never waits on the writer lock or an fsync
+_logins = db.BatchWriter(_write_logins, interval=float(os.getenv("LAST_LOGIN_FLUSH_INTERVAL", "1.0")),
+                         name="login-writer")
+
+
+class AccountExists(Exception):
+    """The username or email, named by field, already belongs to an account"""
+
+    def __init__(self, field):
+        super().__init__(f"{field} already taken")
+        self.field = field
+
+
+def normalize_username(username):
+    """Usernames keep their display case; uniqueness and lookups ignore it"""
+    return username.strip()
+
+def normalize_email(email):
+    """Emails are stored trimmed and lowercased"""
+    return email.strip().lower()
+
+
+# SQLite's NOCASE folds ASCII letters only, so the cache must too: "Émile" and "émile" are two accounts
+_NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _key(username):
+    return normalize_username(username).translate(_NOCASE)
+
+
+def verify_user(username, password):
+    """Verify user credentials, returning their profile on success"""
+    # One point lookup on the case-insensitive username index, then the hash check in Python
+    with db.connection() as conn:
+        row = conn.execute(f'SELECT {PROFILE_COLUMNS}, password_hash FROM users WHERE username = ? COLLATE NOCASE',
+                           (normalize_username(username),)).fetchone()
+    if not row:
+        passwords.burn()
+        return None
+    profile, stored = UserProfile(*row[:-1]), row[-1]
+    if not passwords.verify_password(password, stored):
+        return None
+    # Legacy SHA-256 and under-cost hashes are upgraded while the plaintext is at hand
+    if passwords.needs_rehash(stored):
+        with db.connection() as conn:
+            conn.execute('UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?',
+                         (passwords.hash_password(password), profile.id, stored))
+    _profiles.set(_key(profile.username), profile)
+    return profile
+
+def update_last_login(user_id):
+    """Queue a last login timestamp; the login writer stores it in the background"""
+    _logins.put((user_id, datetime.now()))
+
+def get_user_profile(username):
+    """Load a user's profile row in one query, served from cache when possible"""
+    profile = _profiles.get(_key(username))
+    if profile is None:
+        with db.connection() as conn:
+            row = conn.execute(f'SELECT {PROFILE_COLUMNS} FROM users WHERE username = ? COLLATE NOCASE',
+                               (normalize_username(username),)).fetchone()
+        if not row:
+            return None
+        profile = UserProfile(*row)
+        _profiles.set(_key(username), profile)
+    return profile
+
+def invalidate_profile(username):
+    """Drop a cached profile after its row changes"""
+    _profiles.pop(_key(username))
+
+def create_user(username, email, password, gender=None, chatbot_name=None, chatbot_gender=None):
+    """Create new user in database; raises AccountExists if the username or email is taken"""
+    username, email = normalize_username(username), normalize_email(email)
+    password_hash = passwords.hash_password(password)
+    # A single INSERT: the unique indexes decide, so two signups racing for a name cannot both win
+    try:
+        with db.connection() as conn:
+            conn.execute('INSERT INTO users (username, email, password_hash, gender, chatbot_name, chatbot_gender) VALUES (?, ?, ?, ?, ?, ?)',
+                         (username, email, password_hash, gender, chatbot_name, chatbot_gender))
+    except sqlite3.IntegrityError as e:
+        raise AccountExists("email" if "email" in str(e) else "username") from e
+    invalidate_profile(username)
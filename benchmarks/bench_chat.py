@@ -0,0 +1,127 @@
+"""Throughput and latency of the chat send path against a local fake Groq API.
+
+    python benchmarks/bench_chat.py [--users 20] [--turns 8] [--latency-ms 150] [--error-rate 0.05]
+
+Each simulated user is a ChatSession driven through the same ChatEngine as the
+app's Send button: store the message, build the persona prompt, trim the
+context to the token budget, queue the completion on the scheduler, stream the
+reply through the retrying client, store it and record the turn's metrics.
+Runs offline on CPU only, against a throwaway database.
+
+Exits non-zero if any turn failed or, with --max-p95-ms, if p95 turn latency
+is above that bound.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["USERS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="chat-bench-"), "users.db")
+# Keep every turn in the metrics ring buffer so percentiles cover the whole run
+os.environ.setdefault("METRICS_WINDOW", "1000000")
+
+import db  # noqa: E402
+import storage  # noqa: E402
+from chat_core import ChatEngine, ChatSession  # noqa: E402
+from context import DEFAULT_BUDGET  # noqa: E402
+from fake_groq import FakeGroq, start  # noqa: E402
+from groq_client import get_client  # noqa: E402
+from metrics import turn_metrics  # noqa: E402
+from migrations import ensure_schema  # noqa: E402
+from scheduler import DEFAULT_CONCURRENCY, CompletionScheduler  # noqa: E402
+
+MODEL = "llama3-8b-8192"
+PROMPTS = ["how was your day?", "tell me something that made you laugh recently",
+           "what should I cook tonight, I have rice, eggs and some spinach",
+           "I've been stressed about exams, any advice on keeping calm?",
+           "recommend a movie for a rainy evening", "what do you think about learning the guitar at thirty?",
+           "can you help me plan a weekend trip somewhere quiet", "tell me more about that"]
+
+
+class Failures:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self):
+        with self._lock:
+            self.count += 1
+
+
+def run_user(user_id, args, engine, failures):
+    rng = random.Random(user_id)
+    session = ChatSession(user_id=user_id, username=f"bench-user-{user_id}", logged_in=True, chatbot_name="Sam",
+                          chatbot_gender="Female", user_gender="Male", model=MODEL, temperature=0.7,
+                          context_budget=args.budget)
+    for _ in range(args.turns):
+        try:
+            engine.send(session, rng.choice(PROMPTS), stream=not args.no_stream)
+        except Exception:
+            failures.add()
+        if args.think_ms:
+            time.sleep(rng.uniform(0, 2 * args.think_ms / 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--turns", type=int, default=8, help="messages sent by each user")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="in-flight requests per model")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET, help="context token budget")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a user's turns")
+    parser.add_argument("--no-stream", action="store_true")
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="fake API mean time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-p95-ms", type=float, help="fail if p95 turn latency exceeds this")
+    args = parser.parse_args()
+
+    fake = FakeGroq(args.latency_ms / 1000, args.tokens_per_second, args.reply_tokens, args.error_rate)
+    server, url = start(fake)
+    scheduler = CompletionScheduler(default_limit=args.concurrency)
+    engine = ChatEngine(get_client("bench", url), scheduler=scheduler)
+    ensure_schema()
+    with db.connection() as conn:
+        conn.executemany('INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)',
+                         [(i, f"bench-user-{i}", f"bench-user-{i}@example.com", "-") for i in range(1, args.users + 1)])
+    failures = Failures()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as users:
+        for user_id in range(1, args.users + 1):
+            users.submit(run_user, user_id, args, engine, failures)
+    elapsed = time.perf_counter() - started
+    storage.writer.flush()
+    with db.connection() as conn:
+        stored = conn.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+    server.shutdown()
+
+    turns = turn_metrics.turns()
+    reply_tokens = sum(turn.completion_tokens for turn in turns)
+    print(f"users={args.users} turns={len(turns)} failed={failures.count} concurrency={args.concurrency} "
+          f"stream={not args.no_stream} elapsed={elapsed:.2f}s")
+    print(f"throughput {len(turns) / elapsed:.1f} turns/s, {reply_tokens / elapsed:.0f} reply tokens/s; "
+          f"api requests={fake.requests} injected errors={fake.errors} retries={engine.completions.retries}; "
+          f"messages stored={stored}")
+    if not turns:
+        return 1
+    report = turn_metrics.summary()
+    print(f"{'':12}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+    for name, field in (("queue wait", "queue_wait"), ("first token", "ttft"), ("turn", "latency")):
+        if report[field][0.5] is not None:
+            print(f"{name:12}" + "".join(f"{report[field][q] * 1000:9.1f}" for q in (0.5, 0.95, 0.99)))
+    if failures.count:
+        return 1
+    if args.max_p95_ms is not None and report["latency"][0.95] * 1000 > args.max_p95_ms:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
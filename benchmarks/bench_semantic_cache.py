@@ -0,0 +1,117 @@
+"""Answer quality and lookup latency of the semantic first-turn cache, offline and CPU only.
+
+    python benchmarks/bench_semantic_cache.py [--entries 2000] [--queries 2000] [--threshold 0.6]
+
+Quality comes from benchmarks/semantic_pairs.tsv, labelled pairs of opening
+questions: each first question is cached, the second looked up. A hit on a
+positive pair is a reuse; a hit on a negative pair hands one user's answer to a
+different question, a false positive. Thresholds around the chosen one are
+swept for comparison.
+
+Exits non-zero if the false positive rate is above --max-false-positive-rate, or
+if p99 lookup latency is not at least ten times below --round-trip-ms, a
+conservative figure for one Groq completion round trip.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_cache import SIMILARITY_THRESHOLD, SemanticCache, VectorIndex, embed  # noqa: E402
+
+PAIRS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "semantic_pairs.tsv")
+
+OPENERS = ["how was", "how's", "tell me about", "what do you think about", "what's new with",
+           "any plans for", "how do you feel about", "what made you smile during"]
+TOPICS = ["your day", "the weekend", "work", "your family", "that movie", "the weather", "school",
+          "your hobbies", "music lately", "your trip", "dinner", "the game last night", "your pets"]
+TAILS = ["", " going", " so far", " today", " honestly", " lately", "?"]
+
+
+def sentences(count, rng):
+    return [f"{rng.choice(OPENERS)} {rng.choice(TOPICS)}{rng.choice(TAILS)} #{i}" for i in range(count)]
+
+
+def load_pairs(path=PAIRS):
+    """[(same_question, first, second)] from a tab-separated file; # starts a comment"""
+    with open(path, encoding="utf-8") as f:
+        return [(label == "1", first, second) for label, first, second in
+                (line.rstrip("\n").split("\t") for line in f if line.strip() and not line.startswith("#"))]
+
+
+def quality(pairs, threshold):
+    """(recall on positive pairs, false positive rate on negative pairs, false positive pairs)"""
+    hits = {True: 0, False: 0}
+    false_positives = []
+    for same, first, second in pairs:
+        cache = SemanticCache(threshold)
+        cache.put("pair", first, "answer")
+        if cache.get("pair", second) is not None:
+            hits[same] += 1
+            if not same:
+                false_positives.append((first, second))
+    positives = sum(1 for same, _, _ in pairs if same)
+    negatives = len(pairs) - positives
+    return hits[True] / max(positives, 1), hits[False] / max(negatives, 1), false_positives
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=2000, help="cached first turns in one scope")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--round-trip-ms", type=float, default=300.0)
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD)
+    parser.add_argument("--max-false-positive-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    pairs = load_pairs()
+    positives = sum(1 for same, _, _ in pairs if same)
+    print(f"pairs: {positives} same question, {len(pairs) - positives} different")
+    print(f"{'threshold':>10}{'recall':>9}{'false pos':>11}")
+    for threshold in sorted({round(args.threshold + step, 2) for step in (-0.2, -0.1, -0.05, 0, 0.05, 0.1, 0.2)}):
+        recall, false_positive_rate, _ = quality(pairs, threshold)
+        marker = "  <- chosen" if threshold == round(args.threshold, 2) else ""
+        print(f"{threshold:10.2f}{recall:9.2f}{false_positive_rate:11.2f}{marker}")
+    recall, false_positive_rate, false_positives = quality(pairs, args.threshold)
+    for first, second in false_positives:
+        print(f"false positive: {first!r} answered {second!r}")
+
+    rng = random.Random(1)
+    cache = SemanticCache(args.threshold)
+    # Allow the whole corpus into one scope so the bucketed search path is exercised
+    cache._indexes["bench"] = VectorIndex(max_entries=max(args.entries, 1))
+    started = time.perf_counter()
+    for text in sentences(args.entries, rng):
+        cache.put("bench", text, "answer")
+    build_ms = (time.perf_counter() - started) * 1000
+
+    embed_ms, lookup_ms = [], []
+    for text in sentences(args.queries, rng):
+        started = time.perf_counter()
+        embed(text)
+        embed_ms.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        cache.get("bench", text)
+        lookup_ms.append((time.perf_counter() - started) * 1000)
+
+    print(f"entries={args.entries} queries={args.queries} build={build_ms:.0f}ms hit_rate={cache.hits / args.queries:.2f}")
+    print(f"{'':8}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+    for name, samples in (("embed", embed_ms), ("lookup", lookup_ms)):
+        print(f"{name:8}" + "".join(f"{percentile(samples, p):9.3f}" for p in (50, 95, 99)))
+    p99 = percentile(lookup_ms, 99)
+    print(f"p99 lookup is {args.round_trip_ms / p99:.0f}x faster than a {args.round_trip_ms:.0f} ms Groq round trip")
+    if false_positive_rate > args.max_false_positive_rate:
+        return 1
+    return 0 if p99 * 10 <= args.round_trip_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
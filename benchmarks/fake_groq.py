@@ -0,0 +1,139 @@
+"""Local stand-in for the Groq chat completions API, for offline benchmarks.
+
+    python benchmarks/fake_groq.py [--port 8089] [--latency-ms 150] [--tokens-per-second 400]
+
+Point the app or a benchmark at it with base_url="http://127.0.0.1:8089". It
+answers POST .../chat/completions in the OpenAI wire format, streamed (SSE) or
+not, after a jittered first-token latency, emitting tokens at a fixed rate and
+failing a configurable share of requests with a retryable status.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("sure", "that", "sounds", "really", "fun", "tell", "me", "more", "about", "it", "I", "think",
+         "you", "would", "enjoy", "a", "walk", "after", "dinner", "and", "some", "music", "tonight")
+
+
+class FakeGroq:
+    """Response timing and failure settings, plus counters, shared by every request handler"""
+
+    def __init__(self, latency=0.15, tokens_per_second=400.0, reply_tokens=60, error_rate=0.0,
+                 error_status=503, seed=1):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def plan(self):
+        """(fail, first-token delay) for the next request"""
+        with self._lock:
+            self.requests += 1
+            fail = self._rng.random() < self.error_rate
+            self.errors += fail
+            return fail, self.latency * self._rng.uniform(0.5, 1.5)
+
+    def reply(self):
+        with self._lock:
+            return [self._rng.choice(WORDS) for _ in range(self.reply_tokens)]
+
+
+def _handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, status, payload, headers=()):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if not self.path.endswith("/chat/completions"):
+                return self._json(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+            fail, delay = fake.plan()
+            time.sleep(delay)
+            if fail:
+                return self._json(fake.error_status, {"error": {"message": "Service overloaded", "type": "overloaded"}},
+                                  [("Retry-After", "0")])
+            words = fake.reply()
+            prompt_tokens = sum(len(m["content"]) // 4 + 5 for m in request["messages"])
+            if request.get("stream"):
+                self._stream(request["model"], words)
+            else:
+                time.sleep(len(words) / fake.tokens_per_second)
+                self._json(200, {
+                    "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()),
+                    "model": request["model"],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                              "total_tokens": prompt_tokens + len(words)},
+                })
+
+        def _stream(self, model, words):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            for i, word in enumerate(words):
+                chunk = {"id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model,
+                         "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word},
+                                      "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(1 / fake.tokens_per_second)
+            self.wfile.write(b"data: [DONE]\n\n")
+
+    return Handler
+
+
+def start(fake, port=0):
+    """Serve fake on a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-groq", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="mean time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    fake = FakeGroq(args.latency_ms / 1000, args.tokens_per_second, args.reply_tokens, args.error_rate,
+                    args.error_status)
+    server, url = start(fake, args.port)
+    print(f"Fake Groq API listening on {url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Cold-start import cost of the app's first paint, the login page.
+
+    python benchmarks/import_profile.py [--app app.py] [--top 15] [--page login|chat]
+
+Runs the Streamlit script once in a fresh interpreter under `python -X importtime`
+through Streamlit's AppTest harness, against a throwaway database, and reports
+the modules the script itself imported (Streamlit's own runtime is excluded),
+heaviest first by cumulative time. benchmarks/import_profile.txt holds a
+checked-in run.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = "-- app script starts --"
+
+# Runs in the child interpreter: load the test harness first, then mark where the app's own imports begin
+CHILD = f"""
+import sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.secrets["GROQ_API_KEY"] = "profile"
+if sys.argv[2] == "chat":
+    at.session_state["logged_in"] = True
+    at.session_state["username"] = "Demo User"
+    at.session_state["user_id"] = 0
+before = set(sys.modules)
+sys.stderr.write("{MARKER}\\n"); sys.stderr.flush()
+started = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - started
+sys.stderr.flush()
+print(elapsed, *(name for name in ("groq", "httpx", "numpy") if name in set(sys.modules) - before))
+"""
+
+
+def profile(app, page):
+    """(first run seconds, loaded heavy packages, [(cumulative_us, self_us, module)] of top-level imports)"""
+    env = dict(os.environ, USERS_DB_PATH=os.path.join(tempfile.mkdtemp(prefix="import-profile-"), "users.db"),
+               PYTHONPATH=os.path.dirname(os.path.abspath(app)))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD, app, page], capture_output=True,
+                            text=True, env=env, cwd=os.path.dirname(os.path.abspath(app)), check=True)
+    lines = result.stderr.split(MARKER, 1)[1].splitlines()
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under the module that pulled them in; keep the top level only
+        if not name.startswith(" " * 3) and self_us.strip().isdigit():
+            imports.append((int(cumulative_us), int(self_us), name.strip()))
+    elapsed, *loaded = result.stdout.split()
+    return float(elapsed), loaded, sorted(imports, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--page", choices=["login", "chat"], default="login")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    elapsed, loaded, imports = profile(args.app, args.page)
+    total = sum(cumulative for cumulative, _, _ in imports)
+    print(f"{args.page} page, first run: {elapsed * 1000:.0f} ms, of which imports {total / 1000:.0f} ms "
+          f"across {len(imports)} top-level modules; heavy packages it loaded: {', '.join(loaded) or 'none'}")
+    print(f"{'cumulative ms':>14}{'self ms':>9}  module")
+    for cumulative, self_us, name in imports[:args.top]:
+        print(f"{cumulative / 1000:14.1f}{self_us / 1000:9.1f}  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
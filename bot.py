@@ -1,22 +1,35 @@
 import os
+import sys
 
-from groq import Groq
+from chat_core import ChatEngine, ChatSession
+from groq_client import get_client
+from response_cache import MAX_CACHEABLE_TEMPERATURE
 
-prompt=input("enter your prompt")
+api_key = os.getenv("GROQ_API_KEY")
+if not api_key:
+    sys.exit("Set GROQ_API_KEY to your Groq API key")
 
-client = Groq(
-    api_key=os.getenv("GROQ_API_KEY", "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"),
-)
+# Only focused sampling is cached, so RESPONSE_CACHE=1 defaults to the warmest cacheable temperature
+reuse_responses = os.getenv("RESPONSE_CACHE") == "1"
+temperature = float(os.getenv("BOT_TEMPERATURE", str(MAX_CACHEABLE_TEMPERATURE if reuse_responses else 1.0)))
+if reuse_responses and temperature > MAX_CACHEABLE_TEMPERATURE:
+    sys.exit(f"RESPONSE_CACHE=1 needs BOT_TEMPERATURE <= {MAX_CACHEABLE_TEMPERATURE}")
+
+prompt=input("enter your prompt")
 
-chat_completion = client.chat.completions.create(
-    messages=[
-        {
-            "role": "user",
-            "content": prompt,
+client = get_client(api_key)
 
-        }
-    ],
+# No persona or system prompt: the model sees just the prompt.
+# Opt in with RESPONSE_CACHE=1 to answer repeated prompts without an API call;
+# otherwise the one-shot run leaves users.db alone
+session = ChatSession(
+    system_prompt=None,
     model="llama-3.3-70b-versatile",
+    temperature=temperature,
+    reuse_responses=reuse_responses,
 )
+# The reply is left uncapped, like a plain API call. It is streamed, so the per-attempt timeout
+# bounds the wait for each chunk rather than the whole generation
+reply = ChatEngine(client, persist=False).send(session, prompt, stream=True, max_tokens=None)
 
-print(chat_completion.choices[0].message.content)
\ No newline at end of file
+print(reply["content"])
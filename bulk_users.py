@@ -0,0 +1,149 @@
+"""Bulk import and export of user accounts.
+
+    python bulk_users.py import users.csv [--update] [--chunk-size 10000]
+    python bulk_users.py export users.jsonl
+
+Files are CSV with a header row, or JSON Lines, chosen by extension or
+--format. Columns: username, email, password_hash or password, gender,
+chatbot_name, chatbot_gender, created_at. Imported rows carrying a
+password_hash (scrypt or legacy SHA-256) are stored as is; plaintext password
+rows are hashed on the KDF thread pool, which then dominates the import time.
+"""
+import argparse
+import csv
+import itertools
+import json
+import sqlite3
+import sys
+import time
+
+import db
+import passwords
+from accounts import normalize_email, normalize_username
+from migrations import ensure_schema
+
+CHUNK_SIZE = 10000
+EXPORT_COLUMNS = ["username", "email", "password_hash", "gender", "chatbot_name", "chatbot_gender",
+                  "created_at", "last_login"]
+IMPORT_COLUMNS = ["username", "email", "password_hash", "gender", "chatbot_name", "chatbot_gender", "created_at"]
+
+_INSERT = f'''
+    INSERT INTO users ({", ".join(IMPORT_COLUMNS)})
+    VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+'''
+# Existing usernames or emails are left alone
+INSERT_NEW = _INSERT + 'ON CONFLICT DO NOTHING'
+# Existing usernames take the imported profile, keeping fields the file leaves blank;
+# rows whose email belongs to someone else are skipped
+UPSERT = _INSERT + '''
+    ON CONFLICT(username COLLATE NOCASE) DO UPDATE SET email = excluded.email, password_hash = excluded.password_hash,
+        gender = COALESCE(excluded.gender, gender),
+        chatbot_name = COALESCE(excluded.chatbot_name, chatbot_name),
+        chatbot_gender = COALESCE(excluded.chatbot_gender, chatbot_gender)
+    ON CONFLICT DO NOTHING
+'''
+
+
+def _format(path, fmt):
+    return fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+
+
+def read_rows(path, fmt=None):
+    """Stream dict rows from a CSV or JSON Lines file"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if _format(path, fmt) == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def _prepare(chunk):
+    """Tuples for executemany, hashing plaintext passwords in parallel; rows missing required fields are dropped"""
+    rows = [row for row in chunk
+            if row.get("username") and row.get("email") and (row.get("password_hash") or row.get("password"))]
+    for row in rows:
+        row["username"], row["email"] = normalize_username(row["username"]), normalize_email(row["email"])
+    plaintext = [row for row in rows if not row.get("password_hash")]
+    for row, password_hash in zip(plaintext, passwords.hash_passwords(row["password"] for row in plaintext)):
+        row["password_hash"] = password_hash
+    return [tuple(row.get(column) or None for column in IMPORT_COLUMNS) for row in rows], len(chunk) - len(rows)
+
+
+def import_users(rows, chunk_size=CHUNK_SIZE, update=False):
+    """Insert rows in one transaction per chunk; returns counts of read, written, skipped and invalid rows"""
+    ensure_schema()
+    sql = UPSERT if update else INSERT_NEW
+    counts = {"read": 0, "written": 0, "skipped": 0, "invalid": 0}
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return counts
+        values, invalid = _prepare(chunk)
+        with db.connection() as conn:
+            before = conn.total_changes
+            try:
+                conn.executemany(sql, values)
+            except sqlite3.IntegrityError:
+                # An upsert moved an email onto another account: redo the chunk row by row, skipping offenders
+                conn.rollback()
+                before = conn.total_changes
+                for value in values:
+                    try:
+                        conn.execute(sql, value)
+                    except sqlite3.IntegrityError:
+                        pass
+            written = conn.total_changes - before
+        counts["read"] += len(chunk)
+        counts["invalid"] += invalid
+        counts["written"] += written
+        counts["skipped"] += len(values) - written
+
+
+def export_users(path, fmt=None, batch_size=CHUNK_SIZE):
+    """Write every user to a CSV or JSON Lines file; returns the number of rows"""
+    ensure_schema()
+    fmt = _format(path, fmt)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f, db.connection() as conn:
+        writer = csv.writer(f) if fmt == "csv" else None
+        if writer:
+            writer.writerow(EXPORT_COLUMNS)
+        cursor = conn.execute(f'SELECT {", ".join(EXPORT_COLUMNS)} FROM users ORDER BY id')
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return count
+            if writer:
+                writer.writerows(batch)
+            else:
+                f.writelines(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in batch)
+            count += len(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows per transaction")
+    parser.add_argument("--update", action="store_true", help="overwrite profiles of existing usernames")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.action == "import":
+        counts = import_users(read_rows(args.path, args.format), args.chunk_size, args.update)
+        rows = counts["read"]
+        summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+    else:
+        rows = export_users(args.path, args.format, args.chunk_size)
+        summary = f"{rows} exported"
+    elapsed = time.perf_counter() - started
+    print(f"{summary} in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
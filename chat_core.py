@@ -0,0 +1,295 @@
+"""Chat pipeline without any UI: persona, context, caches, rate limits, the Groq call and storage.
+
+The Streamlit app, bot.py and the benchmarks all drive conversations through
+ChatEngine, so none of this needs Streamlit to be imported or a script rerun.
+"""
+import queue
+import time
+import uuid
+
+from context import DEFAULT_BUDGET, MAX_REPLY_TOKENS, build_context, count_tokens
+from metrics import turn_metrics
+from migrations import ensure_schema
+from persona import get_persona
+from resilient import resilient
+from response_cache import cache_key, is_cacheable, response_cache
+from scheduler import get_scheduler
+from semantic_cache import persona_scope, semantic_cache
+from storage import save_message
+from summarizer import summaries, with_summary
+
+DEFAULT_MODEL = "llama3-8b-8192"
+DEFAULT_SYSTEM_PROMPT = "You are a warm, friendly and helpful conversational partner."
+
+# Session fields the pipeline reads or writes, with their defaults
+SESSION_DEFAULTS = {
+    "user_id": None,
+    "username": None,
+    "logged_in": False,
+    "conversation_id": None,
+    "messages": None,
+    "user_gender": None,
+    "chatbot_name": None,
+    "chatbot_gender": None,
+    "conversation_style": "friendly",
+    "system_prompt": DEFAULT_SYSTEM_PROMPT,
+    "model": DEFAULT_MODEL,
+    "temperature": 0.8,
+    "context_budget": DEFAULT_BUDGET,
+    "reuse_responses": False,
+}
+
+
+class ChatSession:
+    """One conversation's state, kept in any mutable mapping: a dict, or st.session_state"""
+
+    def __init__(self, state=None, **values):
+        object.__setattr__(self, "state", {} if state is None else state)
+        for name, default in SESSION_DEFAULTS.items():
+            if name in values:
+                self.state[name] = values[name]
+            elif name not in self.state:
+                self.state[name] = default
+        if self.state["messages"] is None:
+            self.state["messages"] = []
+        if self.state["conversation_id"] is None:
+            self.state["conversation_id"] = uuid.uuid4().hex
+
+    def __getattr__(self, name):
+        if name not in SESSION_DEFAULTS:
+            raise AttributeError(name)
+        return self.state[name]
+
+    def __setattr__(self, name, value):
+        if name not in SESSION_DEFAULTS:
+            raise AttributeError(f"ChatSession has no field {name!r}")
+        self.state[name] = value
+
+    @property
+    def user_key(self):
+        """Identity used for fair queueing and rate limits
+
+        Demo sessions all share one name and have no account, so each conversation counts on its own.
+        """
+        return self.username if self.user_id else self.conversation_id
+
+    def persona(self):
+        """Chatbot persona for this session; cached, so repeated turns reuse it"""
+        return get_persona(self.username, self.chatbot_name, self.chatbot_gender, self.user_gender,
+                           self.conversation_style, self.system_prompt)
+
+
+class Turn:
+    """A user message on its way to a reply"""
+
+    def __init__(self, session, text, model, temperature, context, max_tokens=MAX_REPLY_TOKENS):
+        self.session = session
+        self.text = text
+        self.model = model
+        self.temperature = temperature
+        self.context = context
+        self.max_tokens = max_tokens
+        self.started = time.perf_counter()
+        self.streamed = False
+        self.first_token_at = None
+        self.reply_key = None
+        self.semantic_scope = None
+        self.cached_reply = None
+        self.cache_hit = None
+        self.reservation = None
+        self.ticket = None
+        # Re-packs the history for a fallback model with a smaller context window
+        self.pack = None
+
+
+class ChatEngine:
+    """Turns user messages into replies for any number of sessions in one process
+
+    users.db is migrated on first use. With persist=False the engine never stores messages or
+    turn metrics, so a one-shot run only opens the database for an opted-in response cache.
+    """
+
+    def __init__(self, client, scheduler=None, limiter=None, persist=True):
+        self.client = client
+        self.completions = resilient(client)
+        self.scheduler = scheduler or get_scheduler()
+        self.limiter = limiter
+        self.persist = persist
+
+    @staticmethod
+    def _message(role, content, **extra):
+        return {"id": uuid.uuid4().hex, "role": role, "content": content, "created_at": time.time(), **extra}
+
+    def add_message(self, session, role, content, **extra):
+        """Append a chat message and queue it for storage in the background"""
+        return self._record(session, self._message(role, content, **extra))
+
+    def _record(self, session, message):
+        session.messages.append(message)
+        if self.persist and session.logged_in and session.user_id:
+            ensure_schema()
+            save_message(session.user_id, session.conversation_id, message)
+        return message
+
+    def _record_metrics(self, *args, **kwargs):
+        if self.persist:
+            ensure_schema()
+            turn_metrics.record(*args, **kwargs)
+
+    def start_turn(self, session, text, max_tokens=MAX_REPLY_TOKENS):
+        """Record the user's message and get its context ready; raises RateLimited if it cannot be sent soon
+
+        max_tokens caps the reply, or None leaves it to the model. A rate-limited message is not recorded.
+        Check turn.cached_reply before submitting: cached turns go straight to finish(); completions
+        that fail go to abandon().
+        """
+        message = self._message("user", text)
+        messages = session.messages + [message]
+        persona = session.persona()
+        model = session.model
+        # Pack as many recent turns as fit the token budget while leaving room for the reply.
+        # Older turns reach the model through the rolling summary instead.
+        summary = summaries.get(session.conversation_id)
+        system_prompt, budget = with_summary(persona.prompt, summary), session.context_budget
+        context = build_context(system_prompt, messages, model, budget=budget)
+        turn = Turn(session, text, model, session.temperature, context, max_tokens)
+        # Runs on a worker thread, so it only uses values read here
+        turn.pack = lambda fallback: build_context(system_prompt, messages, fallback, budget=budget).messages
+
+        # Identical prompts at a focused temperature can be answered from the response cache,
+        # and opening questions worded differently from the semantic cache
+        if is_cacheable(session.reuse_responses, turn.temperature):
+            # The response cache's second tier lives in users.db
+            ensure_schema()
+            turn.reply_key = cache_key(model, turn.temperature, context.messages)
+            turn.cached_reply = response_cache.get(turn.reply_key)
+            turn.cache_hit = "response" if turn.cached_reply is not None else None
+            if sum(1 for m in messages if m["role"] == "user") == 1:
+                turn.semantic_scope = persona_scope(model, persona.prompt, session.conversation_style)
+                if turn.cached_reply is None:
+                    turn.cached_reply = semantic_cache.get(turn.semantic_scope, text)
+                    turn.cache_hit = "semantic" if turn.cached_reply is not None else None
+
+        # Requests the API will see are paced, or turned away when the wait would be too long
+        if turn.cached_reply is None and self.limiter:
+            turn.reservation = self.limiter.reserve(session.user_key, self._planned_tokens(turn))
+        self._record(session, message)
+        return turn
+
+    def _settle(self, turn, used_tokens):
+        if self.limiter and turn.reservation:
+            self.limiter.settle(turn.reservation, used_tokens)
+            turn.reservation = None
+
+    def abandon(self, turn, partial=""):
+        """Give back the rate-limit tokens of a turn whose completion failed; partial is any text that streamed"""
+        # A request that never produced a token is not billed; a broken stream used its prompt and what it sent
+        self._settle(turn, turn.context.prompt_tokens + count_tokens(partial, turn.model) if partial else 0)
+
+    @staticmethod
+    def _planned_tokens(turn):
+        # Uncapped replies are planned at the usual cap; settling corrects the estimate either way
+        return turn.context.prompt_tokens + (turn.max_tokens or MAX_REPLY_TOKENS)
+
+    @staticmethod
+    def _options(turn):
+        options = {"temperature": turn.temperature}
+        if turn.max_tokens:
+            options["max_tokens"] = turn.max_tokens
+        return options
+
+    def _delay(self, turn):
+        return turn.reservation.wait if turn.reservation else 0.0
+
+    def _on_hedge(self, turn):
+        """Callback counting a hedged duplicate of the turn's request against the API key's limits"""
+        if not self.limiter:
+            return None
+        return lambda: self.limiter.charge(self._planned_tokens(turn))
+
+    def stream(self, turn, tokens):
+        """Queue a streamed completion, putting each token on tokens and None at the end
+
+        The ticket's result is the model that answered.
+        """
+        def job():
+            try:
+                chunks, answered_by = self.completions.stream(turn.context.messages, turn.model,
+                                                              on_hedge=self._on_hedge(turn), pack=turn.pack,
+                                                              **self._options(turn))
+                for chunk in chunks:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if turn.first_token_at is None:
+                            turn.first_token_at = time.perf_counter()
+                        tokens.put(chunk.choices[0].delta.content)
+                return answered_by
+            finally:
+                tokens.put(None)
+        turn.streamed = True
+        turn.ticket = self.scheduler.submit(turn.session.user_key, turn.model, job, delay=self._delay(turn))
+        return turn.ticket
+
+    def request(self, turn):
+        """Queue a non-streamed completion; the ticket's result is (completion, model that answered)"""
+        turn.ticket = self.scheduler.submit(turn.session.user_key, turn.model, lambda: self.completions.complete(
+            turn.context.messages,
+            turn.model,
+            on_hedge=self._on_hedge(turn),
+            pack=turn.pack,
+            **self._options(turn)
+        ), delay=self._delay(turn))
+        return turn.ticket
+
+    def finish(self, turn, reply, answered_by=None, usage=None, **extra):
+        """Store the reply and do the per-turn bookkeeping; returns the assistant message"""
+        finished_at = time.perf_counter()
+        session = turn.session
+        if turn.cached_reply is not None:
+            message = self.add_message(session, "assistant", reply, cached=True, **extra)
+            self._record_metrics(session.user_key, turn.model, finished_at - turn.started, cache_hit=turn.cache_hit)
+            return message
+
+        answered_by = answered_by or turn.model
+        # Streamed chunks carry no usage, so those replies are measured with the context estimator
+        prompt_tokens = usage.prompt_tokens if usage else turn.context.prompt_tokens
+        completion_tokens = usage.completion_tokens if usage else count_tokens(reply, turn.model)
+        self._settle(turn, prompt_tokens + completion_tokens)
+        ttft = turn.first_token_at - turn.started if turn.first_token_at else None
+        latency = finished_at - turn.started
+        if ttft is not None:
+            extra.update(ttft=round(ttft, 3), latency=round(latency, 3))
+        message = self.add_message(session, "assistant", reply, model=answered_by, **extra)
+        self._record_metrics(session.user_key, answered_by, latency,
+                             queue_wait=turn.ticket.queue_wait() if turn.ticket else None, ttft=ttft,
+                             prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                             streamed=turn.streamed)
+
+        # Caches are keyed by the requested model: a fallback's reply must not answer for it later
+        if answered_by == turn.model:
+            if turn.reply_key:
+                response_cache.put(turn.reply_key, turn.model, reply)
+            if turn.semantic_scope:
+                semantic_cache.put(turn.semantic_scope, turn.text, reply)
+        # Fold turns that no longer fit into the summary, in the background after the reply
+        if turn.context.dropped:
+            summaries.refresh(session.conversation_id, session.messages, turn.context.dropped,
+                              self.client, self.scheduler, session.user_key, self.limiter)
+        return message
+
+    def send(self, session, text, stream=True, max_tokens=MAX_REPLY_TOKENS):
+        """Run one turn to completion without a UI; returns the assistant message"""
+        turn = self.start_turn(session, text, max_tokens)
+        if turn.cached_reply is not None:
+            return self.finish(turn, turn.cached_reply)
+        parts = []
+        try:
+            if stream:
+                tokens = queue.Queue()
+                ticket = self.stream(turn, tokens)
+                parts.extend(iter(tokens.get, None))
+                return self.finish(turn, "".join(parts), ticket.result())
+            completion, answered_by = self.request(turn).result()
+        except Exception:
+            self.abandon(turn, "".join(parts))
+            raise
+        return self.finish(turn, completion.choices[0].message.content, answered_by, usage=completion.usage)
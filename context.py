@@ -0,0 +1,67 @@
+import math
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+# Context window of every model offered in the settings panel
+MODEL_CONTEXT_WINDOWS = {
+    "llama3-8b-8192": 8192,
+    "mixtral-8x7b-32768": 32768,
+    "llama3-70b-8192": 8192,
+    "gemma-7b-it": 8192,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Average characters per token for each model's tokenizer on chat text. Estimates
+# err on the high side so a packed prompt never overflows the real window.
+CHARS_PER_TOKEN = {
+    "llama3": 3.6,
+    "mixtral": 3.2,
+    "gemma": 3.4,
+}
+DEFAULT_CHARS_PER_TOKEN = 3.2
+# Role markers and separators the chat template adds around each message
+MESSAGE_OVERHEAD_TOKENS = 5
+
+MAX_REPLY_TOKENS = 1024
+DEFAULT_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "4096"))
+
+Context = namedtuple("Context", ["messages", "prompt_tokens", "dropped"])
+
+
+def context_window(model):
+    return MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+
+def _chars_per_token(model):
+    for family, ratio in CHARS_PER_TOKEN.items():
+        if model.startswith(family):
+            return ratio
+    return DEFAULT_CHARS_PER_TOKEN
+
+
+@lru_cache(maxsize=8192)
+def _estimate(text, chars_per_token):
+    return math.ceil(len(text) / chars_per_token) + MESSAGE_OVERHEAD_TOKENS
+
+
+def count_tokens(text, model):
+    """Estimated prompt tokens for one message; cached per (text, tokenizer)"""
+    return _estimate(text, _chars_per_token(model))
+
+
+def build_context(system_prompt, history, model, budget=DEFAULT_BUDGET, max_tokens=MAX_REPLY_TOKENS):
+    """Pack the newest turns that fit the budget, keeping max_tokens free for the reply"""
+    available = min(budget, context_window(model) - max_tokens)
+    used = count_tokens(system_prompt, model) if system_prompt else 0
+    kept = 0
+    for message in reversed(history):
+        cost = count_tokens(message["content"], model)
+        if kept and used + cost > available:
+            break
+        used += cost
+        kept += 1
+    selected = history[len(history) - kept:]
+    messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+    messages.extend({"role": msg["role"], "content": msg["content"]} for msg in selected)
+    return Context(messages, used, len(history) - kept)
@@ -0,0 +1,182 @@
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("USERS_DB_PATH", "users.db")
+POOL_SIZE = int(os.getenv("USERS_DB_POOL_SIZE", "8"))
+# Prepared statements are cached per connection, keyed on the SQL text
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionPool:
+    """Thread-safe pool of long-lived SQLite connections"""
+
+    def __init__(self, path=DB_PATH, size=POOL_SIZE, timeout=10.0):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _connect(self):
+        """Open a connection tuned for many short concurrent requests"""
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        return conn
+
+    def acquire(self):
+        """Take an idle connection, opening a new one while below the pool size"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection free after {self.timeout}s")
+
+    def release(self, conn):
+        """Return a connection to the pool"""
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success and rolls back on error"""
+        conn = self.acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every idle connection and refuse new checkouts"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide pool, shared by every Streamlit session and rerun"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+                atexit.register(_pool.close)
+    return _pool
+
+
+def connection():
+    """Borrow a pooled connection to users.db"""
+    return get_pool().connection()
+
+
+class BatchWriter:
+    """Background thread that hands queued rows to flush(conn, rows) in one transaction
+
+    The thread starts with the first queued row, so importing a module that owns a writer
+    neither starts threads nor opens the database.
+    """
+
+    def __init__(self, flush, interval=0.25, max_batch=500, name="batch-writer"):
+        self._flush = flush
+        self.interval = interval
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def _start(self):
+        with self._start_lock:
+            if self._started:
+                return
+            self._thread.start()
+            self._started = True
+            # atexit runs handlers last-in first-out: make sure the pool closes after our final flush
+            get_pool()
+            atexit.register(self.flush)
+
+    def put(self, row):
+        """Queue a row; never blocks on disk"""
+        if not self._started:
+            self._start()
+        self._queue.put(row)
+
+    def _drain(self, first=None):
+        rows = [] if first is None else [first]
+        while len(rows) < self.max_batch:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _write(self, rows):
+        try:
+            if rows:
+                with self._write_lock, connection() as conn:
+                    self._flush(conn, rows)
+        finally:
+            for _ in rows:
+                self._queue.task_done()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            # Give a burst time to build up so it lands in a single transaction
+            time.sleep(self.interval)
+            rows = self._drain(first)
+            try:
+                self._write(rows)
+            except Exception:
+                logger.exception("Dropped %d queued rows after a failed write", len(rows))
+
+    def flush(self):
+        """Write everything queued so far, waiting for any batch already in flight"""
+        while True:
+            rows = self._drain()
+            if not rows:
+                break
+            self._write(rows)
+        self._queue.join()
@@ -0,0 +1,12 @@
+import streamlit as st
+
+
+def flash(message, icon=None):
+    """Queue a toast for the next run, so a page can switch without pausing to show it"""
+    st.session_state.setdefault("flashes", []).append((message, icon))
+
+
+def show_flashes():
+    """Show and clear the toasts queued by earlier runs"""
+    for message, icon in st.session_state.pop("flashes", []):
+        st.toast(message, icon=icon)
@@ -0,0 +1,74 @@
+import importlib.util
+import os
+import threading
+
+import httpx
+from groq import Groq
+
+MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", "10"))
+KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "60"))
+TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "30"))
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+HTTP2 = os.getenv("GROQ_HTTP2", "1") == "1" and importlib.util.find_spec("h2") is not None
+
+
+class ConnectionStats:
+    """Counts requests against the TCP connections opened to serve them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def on_request(self, request):
+        # httpcore reports connection lifecycle events through the trace extension
+        request.extensions["trace"] = self._trace
+        with self._lock:
+            self.requests += 1
+
+    def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": max(self.requests - self.new_connections, 0),
+            }
+
+
+stats = ConnectionStats()
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _http_client():
+    """Keep-alive HTTP client shared by every request to the Groq API"""
+    return httpx.Client(
+        http2=HTTP2,
+        timeout=httpx.Timeout(TIMEOUT, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        event_hooks={"request": [stats.on_request]},
+    )
+
+
+def get_client(api_key, base_url=None):
+    """Process-wide Groq client, created once per API key and reused across sessions"""
+    key = (api_key, base_url)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = Groq(api_key=api_key, base_url=base_url, http_client=_http_client())
+                _clients[key] = client
+    return client
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import db
+
+WINDOW = int(os.getenv("METRICS_WINDOW", "2000"))
+QUANTILES = (0.5, 0.95, 0.99)
+# Comma-separated usernames allowed to see the performance panel
+ADMINS = {name.strip() for name in os.getenv("METRICS_ADMINS", "").split(",") if name.strip()}
+# Seconds-valued fields reported as percentiles; None means the stage did not apply to a turn
+TIMINGS = ("queue_wait", "ttft", "latency")
+
+TURN_FIELDS = ["created_at", "user_id", "model", "cache_hit", "streamed", "queue_wait", "ttft", "latency",
+               "prompt_tokens", "completion_tokens"]
+Turn = namedtuple("Turn", TURN_FIELDS)
+
+
+def _write_turns(conn, rows):
+    conn.executemany(f'INSERT INTO turn_metrics ({", ".join(TURN_FIELDS)}) VALUES ({", ".join("?" * len(TURN_FIELDS))})',
+                     rows)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+class TurnMetrics:
+    """Recent chat turns in a ring buffer for live percentiles, also appended to turn_metrics"""
+
+    def __init__(self, window=WINDOW):
+        self._turns = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._writer = db.BatchWriter(_write_turns, interval=1.0, name="metrics-writer")
+        # Lifetime totals survive the ring buffer wrapping, as Prometheus counters must
+        self._counts = {}
+        self._tokens = {"prompt": 0, "completion": 0}
+        self._sums = dict.fromkeys(TIMINGS, 0.0)
+        self._timed = dict.fromkeys(TIMINGS, 0)
+
+    def record(self, user_id, model, latency, queue_wait=None, ttft=None, prompt_tokens=0,
+               completion_tokens=0, cache_hit=None, streamed=False):
+        turn = Turn(time.time(), user_id, model, cache_hit, int(streamed), queue_wait, ttft, latency,
+                    prompt_tokens, completion_tokens)
+        with self._lock:
+            self._turns.append(turn)
+            key = (model, cache_hit or "none")
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self._tokens["prompt"] += prompt_tokens
+            self._tokens["completion"] += completion_tokens
+            for field in TIMINGS:
+                if getattr(turn, field) is not None:
+                    self._sums[field] += getattr(turn, field)
+                    self._timed[field] += 1
+        self._writer.put(tuple(turn))
+        return turn
+
+    def turns(self):
+        with self._lock:
+            return list(self._turns)
+
+    def summary(self, model=None):
+        """p50/p95/p99 of each timing and mean tokens over the ring buffer, optionally for one model"""
+        turns = [turn for turn in self.turns() if model is None or turn.model == model]
+        report = {"turns": len(turns), "cache_hits": sum(1 for turn in turns if turn.cache_hit)}
+        for field in TIMINGS:
+            values = sorted(getattr(turn, field) for turn in turns if getattr(turn, field) is not None)
+            report[field] = {q: percentile(values, q) for q in QUANTILES}
+        fresh = [turn for turn in turns if not turn.cache_hit]
+        for field in ("prompt_tokens", "completion_tokens"):
+            report[field] = sum(getattr(turn, field) for turn in fresh) / len(fresh) if fresh else None
+        return report
+
+    def models(self):
+        return sorted({turn.model for turn in self.turns()})
+
+    def prometheus(self):
+        """Prometheus text exposition: quantiles over the window, counters since process start"""
+        report = self.summary()
+        with self._lock:
+            counts = dict(self._counts)
+            tokens = dict(self._tokens)
+            sums = dict(self._sums)
+            timed = dict(self._timed)
+        lines = ["# HELP chat_turns_total Chat turns answered, by model and cache tier.",
+                 "# TYPE chat_turns_total counter"]
+        for (model, cache_hit), count in sorted(counts.items()):
+            lines.append(f'chat_turns_total{{model="{model}",cache_hit="{cache_hit}"}} {count}')
+        lines += ["# HELP chat_tokens_total Prompt and completion tokens sent to or received from the API.",
+                  "# TYPE chat_tokens_total counter"]
+        for kind, count in tokens.items():
+            lines.append(f'chat_tokens_total{{kind="{kind}"}} {count}')
+        for field in TIMINGS:
+            name = f"chat_turn_{field}_seconds"
+            lines += [f"# HELP {name} Chat turn {field.replace('_', ' ')}; quantiles cover the most recent turns.",
+                      f"# TYPE {name} summary"]
+            for q, value in report[field].items():
+                if value is not None:
+                    lines.append(f'{name}{{quantile="{q}"}} {value:.6f}')
+            lines.append(f"{name}_sum {sums[field]:.6f}")
+            lines.append(f"{name}_count {timed[field]}")
+        return "\n".join(lines) + "\n"
+
+
+turn_metrics = TurnMetrics()
@@ -0,0 +1,168 @@
+import threading
+
+import db
+
+
+def _add_column(conn, table, column, declaration):
+    """Add a column unless an older version of the app already created it"""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def _create_users(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users
+        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+         username TEXT UNIQUE NOT NULL,
+         email TEXT UNIQUE NOT NULL,
+         password_hash TEXT NOT NULL,
+         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+         last_login TIMESTAMP)
+    ''')
+
+
+def _add_profile_columns(conn):
+    _add_column(conn, 'users', 'gender', 'TEXT')
+    _add_column(conn, 'users', 'chatbot_name', 'TEXT')
+    _add_column(conn, 'users', 'chatbot_gender', 'TEXT')
+
+
+def _create_conversations(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS conversations
+        (id TEXT PRIMARY KEY,
+         user_id INTEGER NOT NULL REFERENCES users(id),
+         created_at REAL NOT NULL,
+         updated_at REAL NOT NULL)
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS messages
+        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+         message_id TEXT NOT NULL,
+         user_id INTEGER NOT NULL,
+         conversation_id TEXT NOT NULL REFERENCES conversations(id),
+         role TEXT NOT NULL,
+         content TEXT NOT NULL,
+         created_at REAL NOT NULL)
+    ''')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_messages_user_conversation_created
+                    ON messages (user_id, conversation_id, created_at)''')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_conversations_user_updated
+                    ON conversations (user_id, updated_at)''')
+
+
+def _create_completion_cache(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS completion_cache
+        (key TEXT PRIMARY KEY,
+         model TEXT NOT NULL,
+         response TEXT NOT NULL,
+         size INTEGER NOT NULL,
+         created_at REAL NOT NULL,
+         last_used REAL NOT NULL)
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_completion_cache_last_used ON completion_cache (last_used)')
+
+
+def _create_turn_metrics(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS turn_metrics
+        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+         created_at REAL NOT NULL,
+         user_id TEXT,
+         model TEXT NOT NULL,
+         cache_hit TEXT,
+         streamed INTEGER NOT NULL,
+         queue_wait REAL,
+         ttft REAL,
+         latency REAL NOT NULL,
+         prompt_tokens INTEGER NOT NULL,
+         completion_tokens INTEGER NOT NULL)
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_turn_metrics_created ON turn_metrics (created_at)')
+
+
+def _unique_nocase_logins(conn):
+    # Normalize emails the way accounts.create_user stores them, then refuse to guess
+    # which of two accounts differing only in case should win
+    duplicates = conn.execute('''
+        SELECT 'username', lower(trim(username)), COUNT(*) FROM users GROUP BY lower(trim(username)) HAVING COUNT(*) > 1
+        UNION ALL
+        SELECT 'email', lower(trim(email)), COUNT(*) FROM users GROUP BY lower(trim(email)) HAVING COUNT(*) > 1
+    ''').fetchall()
+    if duplicates:
+        listed = ", ".join(f"{field} {value!r} x{count}" for field, value, count in duplicates)
+        raise RuntimeError(f"Merge or rename accounts that differ only in case before upgrading: {listed}")
+    conn.execute('UPDATE users SET username = trim(username), email = lower(trim(email))')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username_nocase ON users (username COLLATE NOCASE)')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_nocase ON users (email COLLATE NOCASE)')
+
+
+def _create_sessions(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions
+        (key TEXT PRIMARY KEY,
+         user_id INTEGER NOT NULL REFERENCES users(id),
+         created_at REAL NOT NULL,
+         expires_at REAL NOT NULL)
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (user_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)')
+
+
+# Ordered schema steps. Append new steps; never edit or reorder applied ones.
+MIGRATIONS = [
+    (1, "create users table", _create_users),
+    (2, "add gender and chatbot preference columns", _add_profile_columns),
+    (3, "add conversations and messages tables", _create_conversations),
+    (4, "add completion cache table", _create_completion_cache),
+    (5, "add per-turn metrics table", _create_turn_metrics),
+    (6, "add case-insensitive unique indexes on username and email", _unique_nocase_logins),
+    (7, "add remembered login sessions table", _create_sessions),
+]
+
+_lock = threading.Lock()
+_applied = False
+
+
+def current_version(conn):
+    """Highest migration version recorded in the database"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version
+        (version INTEGER PRIMARY KEY,
+         description TEXT NOT NULL,
+         applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
+    ''')
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def migrate(conn):
+    """Apply every pending migration, each in its own transaction"""
+    applied = []
+    for version, description, step in MIGRATIONS:
+        # BEGIN IMMEDIATE takes the write lock, so concurrent processes migrate one at a time
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if version > current_version(conn):
+                step(conn)
+                conn.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                             (version, description))
+                applied.append(version)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return applied
+
+
+def ensure_schema():
+    """Bring users.db up to date once per process; later calls are free"""
+    global _applied
+    if _applied:
+        return
+    with _lock:
+        if not _applied:
+            with db.connection() as conn:
+                migrate(conn)
+            _applied = True
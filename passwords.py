@@ -0,0 +1,124 @@
+import base64
+import hashlib
+import hmac
+import os
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Time one login may spend on key derivation; sets login throughput at ~1000/TARGET_MS per core
+TARGET_MS = float(os.getenv("PASSWORD_HASH_TARGET_MS", "100"))
+MIN_LOG2_N = 14
+MAX_LOG2_N = 20
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+# MiB that all hashes running at once may use together; one scrypt hash needs 128 * r * n bytes
+MAX_MEM_MB = int(os.getenv("PASSWORD_HASH_MAX_MEM", "1024"))
+
+_LEGACY_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _memory(n, r=SCRYPT_R):
+    return 128 * r * n
+
+
+# One hash per core, as long as that many fit the memory budget at the minimum cost
+WORKERS = max(1, min(os.cpu_count() or 2, MAX_MEM_MB * 2**20 // _memory(1 << MIN_LOG2_N)))
+# Calibration stops at the cost whose hashes, one per worker, still fit the budget
+BUDGET_LOG2_N = max([MIN_LOG2_N] + [log2_n for log2_n in range(MIN_LOG2_N, MAX_LOG2_N + 1)
+                                    if WORKERS * _memory(1 << log2_n) <= MAX_MEM_MB * 2**20])
+
+# hashlib.scrypt releases the GIL, so logins in other sessions keep running during a hash
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="kdf")
+_tuned = None
+_tune_lock = threading.Lock()
+
+
+def _b64(data):
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=2 * _memory(n, r) + 1024 * 1024, dklen=KEY_BYTES)
+
+
+def calibrate(target_ms=TARGET_MS):
+    """Smallest scrypt cost (n) whose hash takes at least target_ms on this machine, within the memory budget"""
+    salt = os.urandom(SALT_BYTES)
+    for log2_n in range(MIN_LOG2_N, BUDGET_LOG2_N + 1):
+        started = time.perf_counter()
+        _scrypt("calibration", salt, 1 << log2_n, SCRYPT_R, SCRYPT_P)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= target_ms:
+            break
+    return {"n": 1 << log2_n, "r": SCRYPT_R, "p": SCRYPT_P, "measured_ms": elapsed_ms,
+            "logins_per_core_per_second": 1000 / elapsed_ms}
+
+
+def cost():
+    """Tuned hashing parameters, measured once per process"""
+    global _tuned
+    if _tuned is None:
+        with _tune_lock:
+            if _tuned is None:
+                _tuned = calibrate()
+    return _tuned
+
+
+def _hash(password):
+    params = cost()
+    salt = os.urandom(SALT_BYTES)
+    key = _scrypt(password, salt, params["n"], params["r"], params["p"])
+    return f"scrypt${params['n']}${params['r']}${params['p']}${_b64(salt)}${_b64(key)}"
+
+
+def _verify(password, stored):
+    if _LEGACY_SHA256.match(stored):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+    try:
+        scheme, n, r, p, salt, key = stored.split("$")
+    except ValueError:
+        return False
+    if scheme != "scrypt":
+        return False
+    return hmac.compare_digest(_scrypt(password, _unb64(salt), int(n), int(r), int(p)), _unb64(key))
+
+
+def hash_password(password):
+    """Salted scrypt hash with its parameters, computed on the KDF thread pool"""
+    return _executor.submit(_hash, password).result()
+
+
+def hash_passwords(passwords):
+    """Hash many passwords in parallel across the KDF pool, preserving order"""
+    return list(_executor.map(_hash, passwords))
+
+
+def verify_password(password, stored):
+    """Check a password against a stored scrypt or legacy SHA-256 hash"""
+    return _executor.submit(_verify, password, stored).result()
+
+
+def needs_rehash(stored):
+    """True for legacy hashes and for hashes weaker than the current tuned cost"""
+    if _LEGACY_SHA256.match(stored):
+        return True
+    parts = stored.split("$")
+    if len(parts) != 6 or parts[0] != "scrypt":
+        return True
+    params = cost()
+    return int(parts[1]) < params["n"] or int(parts[2]) != params["r"] or int(parts[3]) != params["p"]
+
+
+def burn():
+    """Spend one hash's worth of time so unknown usernames answer as slowly as wrong passwords"""
+    verify_password(secrets.token_hex(8), f"scrypt${cost()['n']}${SCRYPT_R}${SCRYPT_P}$AAAA$AAAA")
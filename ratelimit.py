@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+
+from cache import TTLCache
+
+# Limits are per minute; 0 turns a bucket off
+USER_RPM = float(os.getenv("RATE_LIMIT_USER_RPM", "20"))
+USER_TPM = float(os.getenv("RATE_LIMIT_USER_TPM", "20000"))
+KEY_RPM = float(os.getenv("RATE_LIMIT_RPM", "30"))
+KEY_TPM = float(os.getenv("RATE_LIMIT_TPM", "30000"))
+# Requests that would wait longer than this are turned away instead of queued
+MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "30"))
+
+
+class RateLimited(Exception):
+    """Raised when a request would have to wait longer than the limiter allows"""
+
+    def __init__(self, eta):
+        super().__init__(f"Rate limit reached, try again in {eta:.0f}s")
+        self.eta = eta
+
+
+class TokenBucket:
+    """Refills per_minute units a minute up to one minute's worth; reservations may run it into debt"""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount, now):
+        """Seconds until amount can be taken; requests bigger than the bucket wait for a full one"""
+        self._refill(now)
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount):
+        self.level -= amount
+
+    def give(self, amount):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class Reservation:
+    """Requests and tokens held for one completion; wait is how long to hold it back"""
+
+    def __init__(self, user_id, tokens, wait):
+        self.user_id = user_id
+        self.tokens = tokens
+        self.wait = wait
+        self.ready_at = time.monotonic() + wait
+
+
+class RateLimiter:
+    """Token buckets per user and for the whole API key, in requests and tokens per minute"""
+
+    def __init__(self, user_rpm=USER_RPM, user_tpm=USER_TPM, rpm=KEY_RPM, tpm=KEY_TPM, max_wait=MAX_WAIT):
+        self.user_rpm = user_rpm
+        self.user_tpm = user_tpm
+        self.max_wait = max_wait
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        # Idle users refill to full within a minute, so their buckets can be forgotten
+        self._users = TTLCache(maxsize=10000, ttl=max_wait + 120)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.rejected = 0
+
+    def _user_buckets(self, user_id):
+        buckets = self._users.get(user_id)
+        if buckets is None:
+            buckets = (TokenBucket(self.user_rpm) if self.user_rpm else None,
+                       TokenBucket(self.user_tpm) if self.user_tpm else None)
+        self._users.set(user_id, buckets)
+        return buckets
+
+    def reserve(self, user_id, tokens, requests=1):
+        """Claim requests and tokens, or raise RateLimited with an ETA if the wait is too long"""
+        now = time.monotonic()
+        with self._lock:
+            user_requests, user_tokens = self._user_buckets(user_id)
+            claims = [(user_requests, requests), (self._requests, requests), (user_tokens, tokens),
+                      (self._tokens, tokens)]
+            claims = [(bucket, amount) for bucket, amount in claims if bucket]
+            wait = max((bucket.wait_for(amount, now) for bucket, amount in claims), default=0.0)
+            if wait > self.max_wait:
+                self.rejected += 1
+                raise RateLimited(wait)
+            for bucket, amount in claims:
+                bucket.take(amount)
+            if wait:
+                self.queued += 1
+        return Reservation(user_id, tokens, wait)
+
+    def charge(self, tokens, requests=1):
+        """Count API traffic no reservation covered, such as a hedged duplicate, against the key's buckets"""
+        with self._lock:
+            for bucket, amount in ((self._requests, requests), (self._tokens, tokens)):
+                if bucket:
+                    bucket.take(amount)
+
+    def settle(self, reservation, used_tokens):
+        """Return tokens a reply did not use, or charge the overage of one that ran past its reservation"""
+        unused = reservation.tokens - used_tokens
+        if not unused:
+            return
+        with self._lock:
+            _, user_tokens = self._user_buckets(reservation.user_id)
+            for bucket in (user_tokens, self._tokens):
+                if bucket and unused > 0:
+                    bucket.give(unused)
+                elif bucket:
+                    bucket.take(-unused)
+
+    def stats(self):
+        return {"queued": self.queued, "rejected": self.rejected}
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(api_key):
+    """Process-wide limiter for one API key, shared by every session using it"""
+    with _limiters_lock:
+        limiter = _limiters.get(api_key)
+        if limiter is None:
+            limiter = _limiters[api_key] = RateLimiter()
+    return limiter
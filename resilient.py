@@ -0,0 +1,243 @@
+import email.utils
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+
+import httpx
+from groq import APIConnectionError, APITimeoutError
+
+MAX_ATTEMPTS = int(os.getenv("GROQ_MAX_ATTEMPTS", "3"))
+BACKOFF_BASE = 0.5
+# A Retry-After longer than this means the model is overloaded; fall back instead of waiting
+BACKOFF_CAP = float(os.getenv("GROQ_BACKOFF_CAP", "8"))
+ATTEMPT_TIMEOUT = float(os.getenv("GROQ_ATTEMPT_TIMEOUT", "15"))
+DEADLINE = float(os.getenv("GROQ_DEADLINE", "30"))
+# Hedging sends a second copy of a request that outlives the model's p95 latency
+HEDGE = os.getenv("GROQ_HEDGE", "0") == "1"
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+# Each model hands over to the next faster one when it is overloaded or retired
+FALLBACK_MODELS = {
+    "llama3-70b-8192": "mixtral-8x7b-32768",
+    "mixtral-8x7b-32768": "llama3-8b-8192",
+    "gemma-7b-it": "llama3-8b-8192",
+}
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETIRED_MARKERS = ("decommissioned", "deprecated", "model_not_found", "does not exist")
+
+
+def status_code(error):
+    return getattr(error, "status_code", None)
+
+
+def is_retryable(error):
+    """Rate limits, server errors, timeouts and dropped connections"""
+    status = status_code(error)
+    return status in RETRYABLE_STATUS or (status is None and isinstance(error, APIConnectionError))
+
+
+def is_read_timeout(error):
+    """The server accepted the request but was still working on it when the attempt timed out"""
+    return isinstance(error, APITimeoutError) and isinstance(error.__cause__, httpx.ReadTimeout)
+
+
+def is_retired(error):
+    """The model is unknown to the API or has been decommissioned"""
+    status = status_code(error)
+    return status == 404 or (status == 400 and any(marker in str(error).lower() for marker in RETIRED_MARKERS))
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait, from a Retry-After header in seconds or as a date"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff(attempt, error=None):
+    """Server-requested delay if any, otherwise exponential backoff with full jitter"""
+    requested = retry_after(error)
+    if requested is not None:
+        return requested
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class LatencyTracker:
+    """Recent successful request latencies per (model, streamed)
+
+    A streamed request returns once its first chunk arrives, so its samples are time to first
+    token; a non-streamed one waits for the whole reply. Mixing them would skew both thresholds.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, model, streamed, seconds):
+        with self._lock:
+            self._samples.setdefault((model, streamed), deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model, streamed, q):
+        """Latency at quantile q, or None until enough samples have been seen"""
+        with self._lock:
+            samples = sorted(self._samples.get((model, streamed), ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+def _prompts(messages, model, pack):
+    """Messages for each model tried: as given for the requested model, re-packed once per fallback"""
+    packed = {model: messages}
+
+    def prompt(candidate):
+        if candidate not in packed:
+            packed[candidate] = pack(candidate) if pack else messages
+        return packed[candidate]
+    return prompt
+
+
+def _discard(close, future):
+    # A hedge that lost the race may still hold an open stream
+    if close and not future.cancelled() and future.exception() is None:
+        close(future.result())
+
+
+class ResilientClient:
+    """Retries, optional hedging and model fallback around a Groq client"""
+
+    def __init__(self, client, hedge=HEDGE, deadline=DEADLINE):
+        # Retries happen here, where Retry-After, the deadline and fallback are all known
+        self._client = client.with_options(max_retries=0)
+        self.hedge = hedge
+        self.deadline = deadline
+        self.latency = LatencyTracker()
+        self._hedges = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+        self.retries = 0
+        self.hedged = 0
+        self.fallbacks = 0
+
+    def complete(self, messages, model, on_hedge=None, pack=None, **options):
+        """Non-streaming completion as (completion, model that answered)
+
+        pack(model) re-packs the prompt for a fallback model, whose context window may be smaller.
+        on_hedge is called whenever a duplicate request is sent, so its cost can be counted. A read
+        timeout is not retried: the server is still generating, and a second copy would be paid for again.
+        """
+        prompt = _prompts(messages, model, pack)
+
+        def call(model, timeout):
+            return self._client.chat.completions.create(messages=prompt(model), model=model, timeout=timeout,
+                                                        **options)
+        return self._run(model, call, streamed=False, on_hedge=on_hedge, retry_read_timeouts=False)
+
+    def stream(self, messages, model, on_hedge=None, pack=None, **options):
+        """Streamed completion as (chunks, model that answered); retries stop once tokens flow"""
+        prompt = _prompts(messages, model, pack)
+
+        def call(model, timeout):
+            stream = self._client.chat.completions.create(messages=prompt(model), model=model, stream=True,
+                                                          timeout=timeout, **options)
+            return stream, next(stream, None)
+        (stream, first), answered_by = self._run(model, call, streamed=True, close=lambda opened: opened[0].close(),
+                                                 on_hedge=on_hedge)
+        return self._chunks(stream, first), answered_by
+
+    @staticmethod
+    def _chunks(stream, first):
+        if first is not None:
+            yield first
+        yield from stream
+
+    def _run(self, model, call, streamed, close=None, on_hedge=None, retry_read_timeouts=True):
+        deadline = time.monotonic() + self.deadline
+        error = None
+
+        def retryable(error):
+            return is_retryable(error) and (retry_read_timeouts or not is_read_timeout(error))
+
+        while model:
+            for attempt in range(MAX_ATTEMPTS):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise error or TimeoutError("Groq request deadline exceeded")
+                try:
+                    return self._attempt(model, call, streamed, min(ATTEMPT_TIMEOUT, remaining), close, on_hedge), model
+                except Exception as e:
+                    error = e
+                    if not retryable(e):
+                        break
+                    delay = backoff(attempt, e)
+                    if attempt + 1 == MAX_ATTEMPTS or delay > BACKOFF_CAP or time.monotonic() + delay >= deadline:
+                        break
+                    self.retries += 1
+                    time.sleep(delay)
+            if not (retryable(error) or is_retired(error)):
+                raise error
+            model = FALLBACK_MODELS.get(model)
+            if model:
+                self.fallbacks += 1
+        raise error
+
+    def _attempt(self, model, call, streamed, timeout, close, on_hedge):
+        started = time.perf_counter()
+        threshold = self.latency.percentile(model, streamed, HEDGE_PERCENTILE) if self.hedge else None
+        if threshold is None or threshold >= timeout:
+            result = call(model, timeout)
+        else:
+            result = self._hedged(model, call, timeout, threshold, close, on_hedge)
+        self.latency.record(model, streamed, time.perf_counter() - started)
+        return result
+
+    def _hedged(self, model, call, timeout, threshold, close, on_hedge):
+        """Race a second copy of a request that has outlived the model's p95 latency"""
+        first = self._hedges.submit(call, model, timeout)
+        done, _ = wait([first], timeout=threshold)
+        if done:
+            return first.result()
+        self.hedged += 1
+        if on_hedge:
+            on_hedge()
+        pending = {first, self._hedges.submit(call, model, timeout)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winners = [future for future in done if future.exception() is None]
+            if winners:
+                for loser in pending | set(winners[1:]):
+                    loser.add_done_callback(partial(_discard, close))
+                return winners[0].result()
+            error = next(iter(done)).exception()
+        raise error
+
+    def stats(self):
+        return {"retries": self.retries, "hedged": self.hedged, "fallbacks": self.fallbacks}
+
+
+_resilient = {}
+_lock = threading.Lock()
+
+
+def resilient(client):
+    """Process-wide resilient wrapper for a shared Groq client, so latency history persists"""
+    with _lock:
+        wrapper = _resilient.get(id(client))
+        if wrapper is None:
+            wrapper = _resilient[id(client)] = ResilientClient(client)
+    return wrapper
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import db
+from cache import TTLCache
+
+# Replies are only reused when sampling is focused enough that any answer would do
+MAX_CACHEABLE_TEMPERATURE = float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", "0.7"))
+TEMPERATURE_BUCKET = 0.2
+CONTEXT_MESSAGES = 6
+TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600)))
+MEMORY_ENTRIES = int(os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", "2048"))
+DISK_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_DISK_MAX_BYTES", str(64 * 1024 * 1024)))
+# Expired and over-size rows are pruned once every this many stores
+PRUNE_EVERY = 100
+
+
+def is_cacheable(enabled, temperature):
+    return enabled and temperature <= MAX_CACHEABLE_TEMPERATURE
+
+
+def cache_key(model, temperature, messages):
+    """Hash of model, temperature bucket, system prompt and the trimmed conversation"""
+    system = [m["content"] for m in messages if m["role"] == "system"]
+    turns = [m for m in messages if m["role"] != "system"]
+    # Greetings are picked at random, so leading assistant turns would only split the cache
+    while turns and turns[0]["role"] == "assistant":
+        turns = turns[1:]
+    trimmed = [(m["role"], " ".join(m["content"].split()).casefold()) for m in turns[-CONTEXT_MESSAGES:]]
+    bucket = round(round(temperature / TEMPERATURE_BUCKET) * TEMPERATURE_BUCKET, 2)
+    payload = json.dumps([model, bucket, system, trimmed], ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier completion cache: an in-memory LRU over a SQLite table in users.db"""
+
+    def __init__(self, ttl=TTL, memory_entries=MEMORY_ENTRIES, disk_max_bytes=DISK_MAX_BYTES):
+        self.ttl = ttl
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = TTLCache(maxsize=memory_entries, ttl=ttl)
+        self._lock = threading.Lock()
+        self._stores = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        response = self._memory.get(key)
+        if response is not None:
+            self.memory_hits += 1
+            return response
+        now = time.time()
+        with db.connection() as conn:
+            row = conn.execute('SELECT response FROM completion_cache WHERE key = ? AND created_at > ?',
+                               (key, now - self.ttl)).fetchone()
+            if row:
+                conn.execute('UPDATE completion_cache SET last_used = ? WHERE key = ?', (now, key))
+        if row is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._memory.set(key, row[0])
+        return row[0]
+
+    def put(self, key, model, response):
+        self._memory.set(key, response)
+        now = time.time()
+        with db.connection() as conn:
+            conn.execute('''
+                INSERT INTO completion_cache (key, model, response, size, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET response = excluded.response, size = excluded.size,
+                    created_at = excluded.created_at, last_used = excluded.last_used
+            ''', (key, model, response, len(response.encode()), now, now))
+        with self._lock:
+            self._stores += 1
+            prune = self._stores % PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Drop expired rows, then least recently used rows until under the size limit"""
+        with db.connection() as conn:
+            conn.execute('DELETE FROM completion_cache WHERE created_at <= ?', (time.time() - self.ttl,))
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM completion_cache').fetchone()[0]
+            if total > self.disk_max_bytes:
+                conn.execute('''
+                    DELETE FROM completion_cache WHERE key IN (
+                        SELECT key FROM (
+                            SELECT key, size, SUM(size) OVER (ORDER BY last_used, key) AS freed
+                            FROM completion_cache)
+                        WHERE freed - size < ?)
+                ''', (total - self.disk_max_bytes,))
+
+    def stats(self):
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+        }
+
+
+response_cache = ResponseCache()
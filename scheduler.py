@@ -0,0 +1,188 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+DEFAULT_CONCURRENCY = int(os.getenv("GROQ_MODEL_CONCURRENCY", "4"))
+MAX_QUEUE = int(os.getenv("GROQ_MAX_QUEUE", "200"))
+
+
+class QueueFull(Exception):
+    """Raised when a model already has as many waiting requests as it will accept"""
+
+
+class Ticket:
+    """Handle for one submitted completion job"""
+
+    def __init__(self, scheduler, user_id, model, job, delay=0.0):
+        self.scheduler = scheduler
+        self.user_id = user_id
+        self.model = model
+        self.job = job
+        self.submitted_at = time.monotonic()
+        self.ready_at = self.submitted_at + delay
+        self.started_at = None
+        self.future = Future()
+        self.started = threading.Event()
+
+    def eta(self):
+        """Seconds until a held-back job joins the queue"""
+        return max(0.0, self.ready_at - time.monotonic())
+
+    def queue_wait(self):
+        """Seconds between submitting and starting, including any rate-limit delay"""
+        return None if self.started_at is None else self.started_at - self.submitted_at
+
+    def position(self):
+        """Place in line (1 = next to run); 0 once the job has started"""
+        if self.started.is_set():
+            return 0
+        return self.scheduler.position(self)
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def wait(self, on_wait=None, poll=0.25):
+        """Block until the job finishes, calling on_wait(position) while it is queued"""
+        # Waiting on the future rather than result(timeout) keeps a job's own TimeoutError from looking like a poll
+        while not wait([self.future], timeout=poll).done:
+            if on_wait and not self.started.is_set():
+                on_wait(self.position())
+        return self.future.result()
+
+
+class _FairQueue:
+    """Per-model queue that serves users round-robin, one request at a time"""
+
+    def __init__(self):
+        self.users = OrderedDict()
+        self.size = 0
+
+    def push(self, ticket):
+        self.users.setdefault(ticket.user_id, deque()).append(ticket)
+        self.size += 1
+
+    def pop(self):
+        user_id, pending = next(iter(self.users.items()))
+        ticket = pending.popleft()
+        # Move the user to the back so everyone else gets a turn first
+        del self.users[user_id]
+        if pending:
+            self.users[user_id] = pending
+        self.size -= 1
+        return ticket
+
+    def position(self, ticket):
+        """1-based place of a waiting ticket in round-robin service order"""
+        lanes = list(self.users.values())
+        place = 0
+        for depth in range(max((len(lane) for lane in lanes), default=0)):
+            for lane in lanes:
+                if depth < len(lane):
+                    place += 1
+                    if lane[depth] is ticket:
+                        return place
+        return 0
+
+
+class CompletionScheduler:
+    """Runs completion jobs on a background asyncio loop with a concurrency limit per model"""
+
+    def __init__(self, limits=None, default_limit=DEFAULT_CONCURRENCY, max_queue=MAX_QUEUE):
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self.max_queue = max_queue
+        self._queues = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(thread_name_prefix="completion")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="completion-scheduler", daemon=True)
+        self._thread.start()
+
+    def limit(self, model):
+        return self.limits.get(model, self.default_limit)
+
+    def submit(self, user_id, model, job, delay=0.0):
+        """Queue a blocking callable or coroutine function, after delay seconds; returns a Ticket"""
+        ticket = Ticket(self, user_id, model, job, delay)
+        with self._lock:
+            queue = self._queues.setdefault(model, _FairQueue())
+            if queue.size >= self.max_queue:
+                raise QueueFull(f"Too many requests waiting for {model}, please try again shortly")
+            if not delay:
+                queue.push(ticket)
+        if delay:
+            self._loop.call_soon_threadsafe(self._loop.call_later, delay, self._enqueue, ticket)
+        else:
+            self._loop.call_soon_threadsafe(self._dispatch, model)
+        return ticket
+
+    def _enqueue(self, ticket):
+        with self._lock:
+            self._queues[ticket.model].push(ticket)
+        self._dispatch(ticket.model)
+
+    def position(self, ticket):
+        with self._lock:
+            queue = self._queues.get(ticket.model)
+            return queue.position(ticket) if queue else 0
+
+    def queued(self, model):
+        with self._lock:
+            queue = self._queues.get(model)
+            return queue.size if queue else 0
+
+    def _dispatch(self, model):
+        with self._lock:
+            queue = self._queues.get(model)
+            while queue and queue.size and self._active.get(model, 0) < self.limit(model):
+                ticket = queue.pop()
+                self._active[model] = self._active.get(model, 0) + 1
+                self._loop.create_task(self._run(ticket))
+
+    @staticmethod
+    def _start(ticket):
+        # Marked when the job really begins: a dispatched job can still wait for a free executor thread
+        ticket.started_at = time.monotonic()
+        ticket.started.set()
+
+    def _call(self, ticket):
+        self._start(ticket)
+        return ticket.job()
+
+    async def _run(self, ticket):
+        try:
+            if asyncio.iscoroutinefunction(ticket.job):
+                self._start(ticket)
+                result = await ticket.job()
+            else:
+                result = await self._loop.run_in_executor(self._executor, self._call, ticket)
+        except BaseException as exc:
+            ticket.future.set_exception(exc)
+        else:
+            ticket.future.set_result(result)
+        finally:
+            with self._lock:
+                self._active[ticket.model] -= 1
+            self._dispatch(ticket.model)
+
+    def shutdown(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide scheduler shared by every Streamlit session"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = CompletionScheduler()
+    return _scheduler
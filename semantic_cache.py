@@ -0,0 +1,206 @@
+import hashlib
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+DIMENSIONS = 512
+# Picked against benchmarks/semantic_pairs.tsv; content words must also agree, see same_subject
+SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.6"))
+MAX_ENTRIES_PER_SCOPE = int(os.getenv("SEMANTIC_CACHE_SCOPE_ENTRIES", "2000"))
+# Below this many entries an exact scan is faster than probing hash buckets
+EXACT_SEARCH_LIMIT = 256
+LSH_BITS = 10
+
+_CONTRACTIONS = {
+    "how's": "how is", "what's": "what is", "where's": "where is", "who's": "who is",
+    "that's": "that is", "there's": "there is", "it's": "it is", "let's": "let us",
+    "i'm": "i am", "you're": "you are", "we're": "we are", "they're": "they are",
+    "don't": "do not", "doesn't": "does not", "didn't": "did not", "can't": "can not",
+    "won't": "will not", "isn't": "is not", "wasn't": "was not", "aren't": "are not",
+    "i've": "i have", "you've": "you have", "i'd": "i would", "you'd": "you would",
+}
+# People often leave the apostrophe out; "were" and "id" are words in their own right
+_CONTRACTIONS.update({word.replace("'", ""): expansion for word, expansion in list(_CONTRACTIONS.items())
+                      if word.replace("'", "") not in ("were", "id")})
+# Tense and person rarely change what an opening question is asking
+_LEMMAS = {
+    "is": "be", "was": "be", "are": "be", "were": "be", "am": "be", "been": "be",
+    "has": "have", "had": "have", "does": "do", "did": "do",
+}
+_WORD = re.compile(r"[a-z0-9']+")
+# Words that make up the template of a question rather than its subject. Two questions are only
+# the same if the words left over agree: "favorite movie" and "favorite food" share a template,
+# not an answer. Question words stay, so "how are you" is not "who are you".
+STOP_WORDS = frozenset("""
+    a an the and or but if so to of in on at for with about from by into over after before up out
+    i me my mine myself you your yours yourself we us our they them their he him his she her it its
+    this that these those there here
+    be have do would can could shall should may might must yes
+    am just really very quite pretty much many some any all more most too also still even ever
+    tell say know think feel like want wanna need let get got go going gonna make doing kind sort type
+    please hey hi hello ok okay well oh anyway actually honestly
+    today lately recently now currently these days so far right now
+""".split())
+
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.7
+TRIGRAM_WEIGHT = 0.25
+
+
+def _tokens(text):
+    words = []
+    for word in _WORD.findall(text.lower().replace("’", "'")):
+        for part in _CONTRACTIONS.get(word, word).split():
+            words.append(_LEMMAS.get(part, part))
+    return words
+
+
+def _stem(word):
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def content_words(text):
+    """The words of a question that say what it is about, with plurals folded"""
+    return frozenset(_stem(word) for word in _tokens(text) if word not in STOP_WORDS)
+
+
+def _close(first, second):
+    """Same word, or a one-letter spelling variant of a longer one (color / colour)"""
+    if first == second:
+        return True
+    if min(len(first), len(second)) < 4 or abs(len(first) - len(second)) > 1:
+        return False
+    if len(first) > len(second):
+        first, second = second, first
+    if len(first) == len(second):
+        return sum(a != b for a, b in zip(first, second)) == 1
+    return any(first == second[:i] + second[i + 1:] for i in range(len(second)))
+
+
+def same_subject(first, second):
+    """True when every content word of each question has a counterpart in the other"""
+    return (all(any(_close(a, b) for b in second) for a in first)
+            and all(any(_close(b, a) for a in first) for b in second))
+
+
+def _add(vector, feature, weight):
+    h = zlib.crc32(feature.encode())
+    vector[h % DIMENSIONS] += weight if h & 0x80000000 else -weight
+
+
+def embed(text):
+    """Unit-length hashed bag of words, word pairs and character trigrams; CPU only"""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    words = _tokens(text)
+    for word in words:
+        _add(vector, "w:" + word, WORD_WEIGHT)
+    for first, second in zip(words, words[1:]):
+        _add(vector, f"b:{first} {second}", BIGRAM_WEIGHT)
+    joined = f" {' '.join(words)} "
+    for i in range(len(joined) - 2):
+        _add(vector, "c:" + joined[i:i + 3], TRIGRAM_WEIGHT)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def persona_scope(model, system_prompt, conversation_style):
+    """Cached answers are only shared between identical personas, styles and models"""
+    return hashlib.sha256(f"{model}\0{conversation_style}\0{system_prompt}".encode()).hexdigest()
+
+
+class VectorIndex:
+    """Growable matrix of unit vectors with random-hyperplane LSH buckets for lookup"""
+
+    def __init__(self, dimensions=DIMENSIONS, capacity=64, max_entries=MAX_ENTRIES_PER_SCOPE, seed=7):
+        self.max_entries = max_entries
+        self._vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self._values = []
+        self._planes = np.random.default_rng(seed).standard_normal((LSH_BITS, dimensions)).astype(np.float32)
+        self._weights = 1 << np.arange(LSH_BITS)
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._values)
+
+    def _signature(self, vector):
+        return int(((self._planes @ vector) > 0) @ self._weights)
+
+    def add(self, vector, value):
+        row = len(self._values)
+        if row == len(self._vectors):
+            self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+        self._vectors[row] = vector
+        self._values.append(value)
+        self._buckets.setdefault(self._signature(vector), []).append(row)
+        if len(self) > self.max_entries:
+            self._compact()
+
+    def _compact(self):
+        """Drop the oldest half of the entries and rebuild the buckets"""
+        keep = range(len(self._values) - self.max_entries // 2, len(self._values))
+        vectors = self._vectors[keep.start:keep.stop].copy()
+        values = self._values[keep.start:keep.stop]
+        self._vectors = np.zeros((max(len(vectors) * 2, 64), vectors.shape[1]), dtype=np.float32)
+        self._values = []
+        self._buckets = {}
+        for vector, value in zip(vectors, values):
+            self.add(vector, value)
+
+    def _candidates(self, vector):
+        # Probe the query's bucket and every bucket one flipped bit away
+        signature = self._signature(vector)
+        rows = list(self._buckets.get(signature, ()))
+        for bit in range(LSH_BITS):
+            rows.extend(self._buckets.get(signature ^ (1 << bit), ()))
+        return np.fromiter(rows, dtype=np.int64, count=len(rows))
+
+    def nearest(self, vector, threshold=-1.0, limit=8):
+        """[(similarity, value)] of the closest stored vectors at or above threshold, best first"""
+        count = len(self._values)
+        if not count:
+            return []
+        if count <= EXACT_SEARCH_LIMIT:
+            rows = np.arange(count)
+        else:
+            rows = self._candidates(vector)
+            if not len(rows):
+                return []
+        scores = self._vectors[rows] @ vector
+        best = np.argsort(-scores)[:limit]
+        return [(float(scores[i]), self._values[rows[i]]) for i in best if scores[i] >= threshold]
+
+
+class SemanticCache:
+    """First-turn answers looked up by meaning, one index per persona scope"""
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, scope, text):
+        vector = embed(text)
+        with self._lock:
+            index = self._indexes.get(scope)
+            candidates = index.nearest(vector, self.threshold) if index else []
+        # Similar wording is not enough: the questions must also be about the same thing
+        words = content_words(text)
+        for _, (stored_words, answer) in candidates:
+            if same_subject(words, stored_words):
+                self.hits += 1
+                return answer
+        self.misses += 1
+        return None
+
+    def put(self, scope, text, answer):
+        vector = embed(text)
+        with self._lock:
+            self._indexes.setdefault(scope, VectorIndex()).add(vector, (content_words(text), answer))
+
+
+semantic_cache = SemanticCache()
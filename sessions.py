@@ -0,0 +1,137 @@
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import namedtuple
+
+import db
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+TTL = float(os.getenv("SESSION_TTL", str(30 * 24 * 3600)))
+MEMORY_ENTRIES = int(os.getenv("SESSION_CACHE_SIZE", "4096"))
+# Revocations made by another process are seen once this process's cached copy expires
+MEMORY_TTL = float(os.getenv("SESSION_CACHE_TTL", "300"))
+# Expired rows are deleted in one statement once every this many new sessions
+PRUNE_EVERY = 100
+
+Session = namedtuple('Session', ['user_id', 'username', 'expires_at'])
+
+
+def _secret():
+    secret = os.getenv("SESSION_SECRET")
+    if secret:
+        return secret.encode()
+    logger.warning("SESSION_SECRET is not set; remembered logins will not survive a restart")
+    return secrets.token_bytes(32)
+
+
+class SessionStore:
+    """Remembered logins: signed opaque tokens mapped to users in SQLite, with an in-memory LRU in front"""
+
+    def __init__(self, ttl=TTL, memory_entries=MEMORY_ENTRIES, memory_ttl=MEMORY_TTL, secret=None):
+        self.ttl = ttl
+        self.memory_ttl = memory_ttl
+        self._secret = secret or _secret()
+        self._memory = TTLCache(maxsize=memory_entries, ttl=memory_ttl)
+        self._lock = threading.Lock()
+        self._created = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _sign(self, session_id):
+        return hmac.new(self._secret, session_id.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def _session_id(self, token):
+        """The token's session id if its signature is ours, without touching the database"""
+        session_id, _, signature = (token or "").partition(".")
+        if session_id and hmac.compare_digest(signature, self._sign(session_id)):
+            return session_id
+        return None
+
+    @staticmethod
+    def _key(session_id):
+        # Only a hash is stored, so a copy of users.db does not hand out live sessions
+        return hashlib.sha256(session_id.encode()).hexdigest()
+
+    def _remember(self, key, session):
+        self._memory.set(key, session, ttl=min(self.memory_ttl, session.expires_at - time.time()))
+
+    def create(self, user_id, username):
+        """Start a session for a logged-in user; returns its token"""
+        session_id = secrets.token_urlsafe(24)
+        key = self._key(session_id)
+        now = time.time()
+        session = Session(user_id, username, now + self.ttl)
+        with db.connection() as conn:
+            conn.execute('INSERT INTO sessions (key, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)',
+                         (key, user_id, now, session.expires_at))
+        self._remember(key, session)
+        with self._lock:
+            self._created += 1
+            prune = self._created % PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+        return f"{session_id}.{self._sign(session_id)}"
+
+    def resolve(self, token):
+        """The live Session behind a token, or None for forged, unknown, revoked or expired tokens"""
+        session_id = self._session_id(token)
+        if session_id is None:
+            self.misses += 1
+            return None
+        key = self._key(session_id)
+        session = self._memory.get(key)
+        if session is not None:
+            self.memory_hits += 1
+            return session
+        with db.connection() as conn:
+            row = conn.execute('''
+                SELECT s.user_id, u.username, s.expires_at FROM sessions s JOIN users u ON u.id = s.user_id
+                WHERE s.key = ? AND s.expires_at > ?
+            ''', (key, time.time())).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        session = Session(*row)
+        self._remember(key, session)
+        return session
+
+    def revoke(self, token):
+        """End one session, e.g. on logout"""
+        session_id = self._session_id(token)
+        if session_id is None:
+            return
+        key = self._key(session_id)
+        self._memory.pop(key)
+        with db.connection() as conn:
+            conn.execute('DELETE FROM sessions WHERE key = ?', (key,))
+
+    def revoke_user(self, user_id):
+        """End every session a user has, on any device"""
+        with db.connection() as conn:
+            conn.execute('DELETE FROM sessions WHERE user_id = ?', (user_id,))
+        # Cached copies are keyed by token, so drop them all rather than search
+        self._memory.clear()
+
+    def prune(self):
+        """Delete every expired session in one statement"""
+        with db.connection() as conn:
+            conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (time.time(),))
+
+    def stats(self):
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+        }
+
+
+sessions = SessionStore()
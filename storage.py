@@ -0,0 +1,64 @@
+import os
+import time
+
+import db
+
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "30"))
+
+
+def _write_messages(conn, rows):
+    """Flush a batch of queued messages, touching each conversation once"""
+    spans = {}
+    for user_id, conversation_id, _, _, _, created_at in rows:
+        _, first, last = spans.get(conversation_id, (user_id, created_at, created_at))
+        spans[conversation_id] = (user_id, min(first, created_at), max(last, created_at))
+    conn.executemany('''
+        INSERT INTO conversations (id, user_id, created_at, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET updated_at = MAX(updated_at, excluded.updated_at)
+    ''', [(conversation_id, user_id, first, last) for conversation_id, (user_id, first, last) in spans.items()])
+    conn.executemany('INSERT INTO messages (user_id, conversation_id, message_id, role, content, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                     rows)
+
+
+# Messages are appended in the background so the send path never waits on disk
+writer = db.BatchWriter(_write_messages, interval=float(os.getenv("MESSAGE_FLUSH_INTERVAL", "0.25")),
+                        name="message-writer")
+
+
+def save_message(user_id, conversation_id, message):
+    """Queue a chat message for storage, stamping it with its creation time"""
+    message.setdefault("created_at", time.time())
+    writer.put((user_id, conversation_id, message["id"], message["role"], message["content"],
+                message["created_at"]))
+
+
+def _page(rows):
+    # Rows arrive newest first; the chat shows them oldest first
+    return [{"id": message_id, "role": role, "content": content, "created_at": created_at}
+            for _, message_id, role, content, created_at in reversed(rows)]
+
+
+def load_latest(user_id, limit=HISTORY_PAGE_SIZE):
+    """Newest page of the user's most recent conversation, as (conversation_id, messages)"""
+    writer.flush()
+    with db.connection() as conn:
+        rows = conn.execute('''
+            SELECT conversation_id, message_id, role, content, created_at FROM messages
+            WHERE user_id = ? AND conversation_id = (
+                SELECT id FROM conversations WHERE user_id = ? ORDER BY updated_at DESC LIMIT 1)
+            ORDER BY created_at DESC LIMIT ?
+        ''', (user_id, user_id, limit)).fetchall()
+    if not rows:
+        return None, []
+    return rows[0][0], _page(rows)
+
+
+def load_before(user_id, conversation_id, before, limit=HISTORY_PAGE_SIZE):
+    """The page of messages written just before the `before` timestamp"""
+    with db.connection() as conn:
+        rows = conn.execute('''
+            SELECT conversation_id, message_id, role, content, created_at FROM messages
+            WHERE user_id = ? AND conversation_id = ? AND created_at < ?
+            ORDER BY created_at DESC LIMIT ?
+        ''', (user_id, conversation_id, before, limit)).fetchall()
+    return _page(rows)
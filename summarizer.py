@@ -0,0 +1,118 @@
+import os
+import threading
+from collections import namedtuple
+
+from cache import TTLCache
+from context import count_tokens
+from ratelimit import RateLimited
+from scheduler import QueueFull
+
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "llama3-8b-8192")
+SUMMARY_MAX_TOKENS = 256
+# Turns folded per summarizer call, so a big eviction never sends a huge prompt
+FOLD_BATCH = 12
+
+SUMMARY_INSTRUCTIONS = """You maintain a running summary of a friendly chat between a user and their AI companion.
+Merge the new turns into the existing summary. Keep names, facts the user shared about themselves,
+their feelings, plans and open questions. Drop small talk. Write at most 150 words in the third person."""
+
+# covered is the created_at of the newest message folded in: positions in a session's message list
+# shift when older pages are loaded in front or the history is reloaded, timestamps do not
+Summary = namedtuple("Summary", ["text", "covered"])
+
+
+def with_summary(system_prompt, summary):
+    """System prompt extended with what the model can no longer see directly"""
+    if not summary or not summary.text:
+        return system_prompt
+    return f"{system_prompt}\n\nSUMMARY OF YOUR EARLIER CONVERSATION (remember and use these details):\n{summary.text}"
+
+
+def _transcript(turns):
+    return "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+
+
+def fold_tokens(turns):
+    """Upper estimate of the tokens one fold of turns uses, counting a full-length summary in and out"""
+    return count_tokens(SUMMARY_INSTRUCTIONS + _transcript(turns), SUMMARY_MODEL) + 2 * SUMMARY_MAX_TOKENS
+
+
+def fold(client, summary_text, turns):
+    """Ask the fast model to merge turns into the existing summary text; returns (text, tokens used)"""
+    transcript = _transcript(turns)
+    completion = client.chat.completions.create(
+        messages=[
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": f"Existing summary:\n{summary_text or '(none yet)'}\n\nNew turns:\n{transcript}"},
+        ],
+        model=SUMMARY_MODEL,
+        temperature=0.2,
+        max_tokens=SUMMARY_MAX_TOKENS,
+        timeout=30
+    )
+    return completion.choices[0].message.content.strip(), completion.usage.total_tokens
+
+
+class RollingSummaries:
+    """Per-conversation summaries of the messages evicted from the prompt"""
+
+    def __init__(self, maxsize=2048, ttl=12 * 3600):
+        self._summaries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id):
+        return self._summaries.get(conversation_id)
+
+    def forget(self, conversation_id):
+        self._summaries.pop(conversation_id)
+
+    def refresh(self, conversation_id, history, upto, client, scheduler, user_id, limiter=None):
+        """Fold the messages in history[:upto] newer than the summary into it, in the background
+
+        With a limiter the folds are paced like chat requests, and skipped while the user is rate limited.
+        """
+        current = self.get(conversation_id) or Summary("", 0.0)
+        # Messages without a timestamp are transient notices that were never stored
+        turns = [msg for msg in history[:upto] if msg.get("created_at", 0.0) > current.covered]
+        if not turns:
+            return None
+        with self._lock:
+            if conversation_id in self._pending:
+                return None
+            self._pending.add(conversation_id)
+        batches = [turns[start:start + FOLD_BATCH] for start in range(0, len(turns), FOLD_BATCH)]
+        used = 0
+
+        def job():
+            nonlocal used
+            try:
+                text, covered = current.text, current.covered
+                for batch in batches:
+                    text, tokens = fold(client, text, batch)
+                    used += tokens
+                    covered = batch[-1]["created_at"]
+                    self._summaries.set(conversation_id, Summary(text, covered))
+                return text
+            finally:
+                if reservation:
+                    limiter.settle(reservation, used)
+                with self._lock:
+                    self._pending.discard(conversation_id)
+
+        reservation = None
+        try:
+            if limiter:
+                reservation = limiter.reserve(user_id, sum(fold_tokens(batch) for batch in batches),
+                                              requests=len(batches))
+            return scheduler.submit(user_id, SUMMARY_MODEL, job, delay=reservation.wait if reservation else 0.0)
+        except (RateLimited, QueueFull):
+            # The summary catches up after a later reply
+            if reservation:
+                limiter.settle(reservation, 0)
+            with self._lock:
+                self._pending.discard(conversation_id)
+            return None
+
+
+summaries = RollingSummaries()
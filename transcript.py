@@ -0,0 +1,39 @@
+import uuid
+from functools import lru_cache
+
+PAGE_SIZE = 30
+
+
+def message_id(message):
+    """Stable id for a chat message, assigned the first time it is rendered"""
+    if "id" not in message:
+        message["id"] = uuid.uuid4().hex
+    return message["id"]
+
+
+def bubble_html(role, label, content):
+    """HTML for one chat bubble"""
+    css = "user-message" if role == "user" else "assistant-message"
+    return f'<div class="chat-message {css}"><strong>{label}:</strong><br>{content}</div>'
+
+
+@lru_cache(maxsize=4096)
+def _cached_bubble(message_key, role, label, content):
+    # message_key keeps identical texts from different messages as separate entries
+    return bubble_html(role, label, content)
+
+
+def message_html(message, assistant_label):
+    label = "👤 You" if message["role"] == "user" else assistant_label
+    return _cached_bubble(message_id(message), message["role"], label, message["content"])
+
+
+def visible_window(messages, window):
+    """The newest `window` messages and how many older ones are hidden"""
+    hidden = max(len(messages) - window, 0)
+    return messages[hidden:], hidden
+
+
+def transcript_html(messages, assistant_label):
+    """One HTML block for a run of messages, built from per-message cached fragments"""
+    return "\n\n".join(message_html(message, assistant_label) for message in messages)
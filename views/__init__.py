@@ -0,0 +1,20 @@
+"""Pages of the app, imported by app.py only when they are shown.
+
+Not named pages/, which Streamlit would turn into a multipage sidebar.
+"""
+import os
+from functools import lru_cache
+
+ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+_TAGS = {".css": "style", ".js": "script"}
+
+
+@lru_cache(maxsize=None)
+def assets_html(*names):
+    """<style> and <script> tags for static assets, read from disk once per process"""
+    tags = []
+    for name in names:
+        tag = _TAGS[os.path.splitext(name)[1]]
+        with open(os.path.join(ASSETS, name), encoding="utf-8") as f:
+            tags.append(f"<{tag}>\n{f.read()}</{tag}>")
+    return "\n".join(tags)
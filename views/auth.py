@@ -0,0 +1,66 @@
+"""Login state shared by the app shell, the login page and the chat page"""
+import uuid
+
+import streamlit as st
+
+from accounts import get_user_profile
+from sessions import sessions
+from storage import HISTORY_PAGE_SIZE, load_latest
+
+# Remembered logins travel as a signed session token in this URL query parameter
+SESSION_PARAM = "session"
+
+
+def load_history():
+    """Bring back the newest page of the user's latest stored conversation"""
+    conversation_id, history = load_latest(st.session_state.user_id)
+    if conversation_id:
+        st.session_state.conversation_id = conversation_id
+        st.session_state.messages = history
+        st.session_state.conversation_started = True
+        st.session_state.history_complete = len(history) < HISTORY_PAGE_SIZE
+
+
+def save_session_data():
+    """Save session data to ensure persistence"""
+    if st.session_state.logged_in and st.session_state.remember_me:
+        # Force session state to persist
+        st.session_state._persistent = True
+
+
+def restore_session():
+    """Restore a remembered login from the session token, even after the browser reconnects"""
+    token = st.query_params.get(SESSION_PARAM)
+    # Tokens and profiles are cached in memory, so a restore rarely reaches the database
+    remembered = sessions.resolve(token) if token else None
+    if remembered:
+        profile = get_user_profile(remembered.username)
+        if profile and profile.id == remembered.user_id:
+            # Restore user data
+            st.session_state.logged_in = True
+            st.session_state.username = profile.username
+            st.session_state.user_id = profile.id
+            st.session_state.remember_me = True
+            st.session_state.user_gender = profile.gender
+            st.session_state.chatbot_name = profile.chatbot_name
+            st.session_state.chatbot_gender = profile.chatbot_gender
+            load_history()
+            return True
+    return False
+
+
+def sign_out(everywhere=False):
+    """Log out and forget this browser's remembered session, or with everywhere every device's"""
+    token = st.query_params.pop(SESSION_PARAM, None)
+    if everywhere and st.session_state.user_id:
+        sessions.revoke_user(st.session_state.user_id)
+    else:
+        sessions.revoke(token)
+    st.session_state.logged_in = False
+    st.session_state.username = None
+    st.session_state.user_id = None
+    st.session_state.remember_me = False
+    st.session_state.messages = []
+    st.session_state.conversation_id = uuid.uuid4().hex
+    st.session_state.history_complete = True
+    st.session_state.page = "login"
@@ -0,0 +1,476 @@
+"""The chat page: menu, settings, transcript and the send path.
+
+The only page that needs the Groq SDK, so app.py imports it once a user is logged in.
+"""
+import queue
+import random
+import uuid
+from datetime import datetime
+
+import streamlit as st
+
+from chat_core import ChatEngine, ChatSession
+from flash import flash
+from groq_client import get_client, stats as connection_stats
+from metrics import ADMINS, TIMINGS, turn_metrics
+from ratelimit import RateLimited, get_limiter
+from response_cache import response_cache
+from semantic_cache import semantic_cache
+from storage import HISTORY_PAGE_SIZE, load_before
+from summarizer import summaries
+from transcript import PAGE_SIZE, bubble_html, transcript_html, visible_window
+from views.auth import sign_out
+
+MODEL_OPTIONS = {
+    "Llama 3 8B (Fastest)": "llama3-8b-8192",
+    "Mixtral 8x7B (Balanced)": "mixtral-8x7b-32768",
+    "Llama 3 70B (Best Quality)": "llama3-70b-8192",
+    "Gemma 7B (Efficient)": "gemma-7b-it"
+}
+MODEL_INFO = {
+    "llama3-8b-8192": "⚡ Fastest responses, best for quick chats",
+    "mixtral-8x7b-32768": "⚖️ Balanced speed and quality",
+    "llama3-70b-8192": "🎯 Best quality, slower responses",
+    "gemma-7b-it": "🚀 Fast and efficient, good for general use"
+}
+STYLE_OPTIONS = {
+    "friendly": "😊 Warm and friendly",
+    "casual": "😎 Relaxed and casual",
+    "enthusiastic": "🎉 Energetic and enthusiastic",
+    "caring": "💝 Very caring and empathetic",
+    "humorous": "😄 Playful and humorous"
+}
+STARTERS = [
+    "How was your day?",
+    "What's the most interesting thing that happened to you recently?",
+    "What are you passionate about?",
+    "What's something you're looking forward to?",
+    "What's your favorite way to spend a weekend?",
+    "What's something that made you smile today?"
+]
+GENDER_EMOJI = {
+    "Male": "👨",
+    "Female": "👩",
+    "Non-binary": "⚧",
+    "Prefer not to say": "🤷"
+}
+TYPING_MESSAGES = [
+    "🤔 Thinking...",
+    "💭 Processing your message...",
+    "✨ Coming up with a response...",
+    "💬 Crafting a reply...",
+    "🧠 Working on it..."
+]
+RESPONSE_VARIATIONS = [
+    "💬 Here's what I think...",
+    "✨ Got it! Here's my take...",
+    "🤔 Let me share my thoughts...",
+    "💭 Here's what comes to mind...",
+    "🌟 Here's my response..."
+]
+
+
+def note_fallback(model, answered_by):
+    """Tell the user when a busy or retired model handed their message to another"""
+    if answered_by != model:
+        flash(f"{model} was unavailable, so {answered_by} answered", icon="🔀")
+
+
+def queue_status(position, eta=0):
+    """Text shown while a request waits for the rate limit or a free model slot"""
+    if eta >= 1:
+        return f"⏳ Pacing requests to stay within the API limits, sending in {eta:.0f}s..."
+    return f"⏳ You're #{position} in line, hang tight..." if position else "💭 ..."
+
+
+def welcome_message(username, style):
+    """A greeting in the chosen conversation style for the time of day"""
+    # Get current time for personalized greeting
+    current_hour = datetime.now().hour
+    if 5 <= current_hour < 12:
+        time_greeting = "Good morning"
+    elif 12 <= current_hour < 17:
+        time_greeting = "Good afternoon"
+    elif 17 <= current_hour < 21:
+        time_greeting = "Good evening"
+    else:
+        time_greeting = "Good night"
+
+    # Style-based welcome messages
+    style_welcomes = {
+        "friendly": [
+            f"{time_greeting} {username}! 👋 How's your day going? I'd love to chat with you!",
+            f"Hi {username}! 😊 What's on your mind today? I'm here to listen and chat!",
+            f"Hello {username}! ✨ How are you feeling? I'm excited to have a conversation with you!"
+        ],
+        "casual": [
+            f"Hey {username}! 😎 What's up? Ready for a good chat?",
+            f"Yo {username}! 🌟 What's new in your world? Let's talk!",
+            f"Hey there {username}! 💫 How's everything going? I'm here for a good chat!"
+        ],
+        "enthusiastic": [
+            f"OMG {username}! 🎉 I'm so excited to chat with you! How are you doing?",
+            f"Hey {username}! ✨ I'm thrilled to be here with you! What's on your mind?",
+            f"Hello {username}! 🌟 I'm pumped to have this conversation! How's your day?"
+        ],
+        "caring": [
+            f"Hi {username}! 💝 I'm here for you. How are you feeling today?",
+            f"Hello {username}! 💕 I care about you and want to know how you're doing!",
+            f"Hey {username}! 💖 I'm here to listen and support you. What's on your heart?"
+        ],
+        "humorous": [
+            f"Hey {username}! 😄 Ready for some fun conversation? What's cracking?",
+            f"Yo {username}! 🤪 Let's have a blast chatting! What's the scoop?",
+            f"Hello {username}! 😂 Time for some good vibes! What's up?"
+        ]
+    }
+    return random.choice(style_welcomes.get(style, style_welcomes["friendly"]))
+
+
+def _menu(persona, engine, limiter):
+    with st.expander("📋 Menu", expanded=True):
+        # User info
+        st.markdown("## 👤 User Profile")
+        st.markdown(f"**Welcome, {st.session_state.username}!**")
+
+        # Display gender if available
+        if st.session_state.get("user_gender"):
+            st.markdown(f"{GENDER_EMOJI.get(st.session_state.user_gender, '👤')} "
+                        f"**Gender:** {st.session_state.user_gender}")
+
+        # Display chatbot info
+        if persona.name:
+            st.markdown(f"🤖 **AI Assistant:** {persona.name} {persona.emoji}")
+
+        # Chat statistics
+        st.markdown("## 📊 Chat Stats")
+        if st.session_state.messages:
+            st.metric("Messages", len(st.session_state.messages))
+            user_msgs = len([m for m in st.session_state.messages if m["role"] == "user"])
+            st.metric("Your Messages", user_msgs)
+            st.metric("AI Responses", len(st.session_state.messages) - user_msgs)
+        if st.session_state.last_ttft is not None:
+            st.metric("First Token", f"{st.session_state.last_ttft:.2f}s")
+        if st.session_state.reuse_responses:
+            cache_stats = response_cache.stats()
+            st.caption(f"♻️ Response cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+                       f"{cache_stats['misses']} misses; similar openers: {semantic_cache.hits} hits")
+        connections = connection_stats.snapshot()
+        if connections["requests"]:
+            st.caption(f"🔌 API connections: {connections['reused_connections']} reused, "
+                       f"{connections['new_connections']} new")
+        recovery = engine.completions.stats()
+        if any(recovery.values()):
+            st.caption(f"🛟 Recovered requests: {recovery['retries']} retries, "
+                       f"{recovery['hedged']} hedged, {recovery['fallbacks']} fallbacks")
+        pacing = limiter.stats()
+        if any(pacing.values()):
+            st.caption(f"🚦 Rate limits: {pacing['queued']} requests paced, {pacing['rejected']} turned away")
+
+        # Latency and token percentiles across all sessions, for tuning models and context size
+        if st.session_state.username in ADMINS:
+            st.markdown("## 📈 Performance")
+            models = ["All models"] + turn_metrics.models()
+            selected = st.selectbox("Model", models, key="metrics_model")
+            report = turn_metrics.summary(None if selected == "All models" else selected)
+            st.caption(f"{report['turns']} recent turns, {report['cache_hits']} answered from cache")
+            st.table([{"stage": field.replace("_", " "),
+                       **{f"p{round(q * 100)}": "–" if value is None else f"{value:.2f}s"
+                          for q, value in report[field].items()}}
+                      for field in TIMINGS])
+            if report["prompt_tokens"] is not None:
+                st.caption(f"🧮 Avg tokens per API turn: {report['prompt_tokens']:.0f} prompt, "
+                           f"{report['completion_tokens']:.0f} completion")
+            st.download_button("⬇️ Prometheus metrics", turn_metrics.prometheus(),
+                               file_name="chat_metrics.prom", mime="text/plain")
+
+        # Logout options
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("🚪 Logout", type="secondary"):
+                sign_out()
+                st.rerun()
+        with col2:
+            if st.button("🗑️ Forget Me", type="secondary"):
+                # Signs out every remembered device, not just this one
+                sign_out(everywhere=True)
+                st.rerun()
+
+
+def _settings():
+    with st.expander("⚙️ Settings", expanded=True):
+        # Model selection
+        st.markdown("### 🤖 Model Selection")
+        selected_model = st.selectbox(
+            "Choose Model:",
+            list(MODEL_OPTIONS.keys()),
+            index=list(MODEL_OPTIONS.keys()).index("Llama 3 8B (Fastest)")
+        )
+        st.session_state.model = MODEL_OPTIONS[selected_model]
+        # Model info
+        st.markdown(f'<div class="model-info">💡 {MODEL_INFO[st.session_state.model]}</div>', unsafe_allow_html=True)
+        # Temperature control
+        st.markdown("### 🌡️ Creativity Level")
+        st.session_state.temperature = st.slider(
+            "Temperature (0.1 = Focused, 1.0 = Creative)",
+            min_value=0.1,
+            max_value=1.0,
+            value=0.8,
+            step=0.1
+        )
+        st.session_state.context_budget = st.slider(
+            "🧠 Conversation memory (tokens of history sent)",
+            min_value=1024,
+            max_value=16384,
+            value=st.session_state.context_budget,
+            step=512
+        )
+        st.session_state.stream_responses = st.checkbox(
+            "⚡ Stream replies as they are written",
+            value=st.session_state.stream_responses
+        )
+        st.session_state.reuse_responses = st.checkbox(
+            "♻️ Reuse answers to repeated prompts (only at temperature 0.7 or below)",
+            value=st.session_state.reuse_responses
+        )
+        # System prompt
+        st.markdown("### 🎭 AI Personality")
+        st.session_state.system_prompt = st.text_area(
+            "System Prompt (AI's personality/role):",
+            value=st.session_state.system_prompt,
+            height=100
+        )
+
+        # Conversation style
+        st.markdown("### 🗣️ Conversation Style")
+        selected_style = st.selectbox(
+            "Choose conversation style:",
+            list(STYLE_OPTIONS.keys()),
+            index=list(STYLE_OPTIONS.keys()).index(st.session_state.conversation_style)
+        )
+        st.session_state.conversation_style = selected_style
+        st.markdown(f"*{STYLE_OPTIONS[selected_style]}*")
+        # Clear chat button
+        if st.button("🗑️ Clear Chat", type="secondary"):
+            summaries.forget(st.session_state.conversation_id)
+            st.session_state.messages = []
+            st.session_state.conversation_id = uuid.uuid4().hex
+            st.session_state.transcript_window = PAGE_SIZE
+            st.session_state.history_complete = True
+            st.session_state.conversation_started = False
+            st.rerun()
+
+        # Conversation starters
+        st.markdown("### 💬 Conversation Starters")
+        st.selectbox("Quick conversation starters:", [""] + STARTERS, key="starter", on_change=_pick_starter)
+
+
+def _pick_starter():
+    # Runs before the rerun: hand the pick to the send path and reset the box, so it is sent once
+    st.session_state.pending_starter = st.session_state.starter
+    st.session_state.starter = ""
+
+
+def _transcript(engine, session, persona):
+    # Display chat messages with better styling
+    st.markdown('<div class="chat-container">', unsafe_allow_html=True)
+
+    # Show welcome message if conversation hasn't started
+    if not st.session_state.conversation_started and not st.session_state.messages:
+        st.session_state.conversation_started = True
+        engine.add_message(session, "assistant",
+                           welcome_message(st.session_state.username, st.session_state.conversation_style),
+                           timestamp=datetime.now().strftime("%H:%M"))
+    # Only the newest page of messages is rendered, as a single block of cached HTML
+    visible_messages, hidden_count = visible_window(st.session_state.messages, st.session_state.transcript_window)
+    if hidden_count or not st.session_state.history_complete:
+        load_label = f"⬆️ Load earlier messages ({hidden_count} hidden)" if hidden_count else "⬆️ Load earlier messages"
+        if st.button(load_label, key="load_earlier"):
+            if hidden_count < PAGE_SIZE and not st.session_state.history_complete:
+                # Fetch the next page from storage with one indexed range query
+                earlier = load_before(st.session_state.user_id, st.session_state.conversation_id,
+                                      st.session_state.messages[0]["created_at"])
+                st.session_state.messages[:0] = earlier
+                st.session_state.history_complete = len(earlier) < HISTORY_PAGE_SIZE
+            st.session_state.transcript_window += PAGE_SIZE
+            st.rerun()
+    if visible_messages:
+        st.markdown(transcript_html(visible_messages, persona.label), unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+def _send(engine, session, user_input, clear_input=True):
+    st.session_state.last_user_input = user_input
+    # Personalized system prompt, built once per persona and settings combination
+    assistant_label = session.persona().label
+    model = st.session_state.model
+
+    # The engine packs the context, checks the caches and rate limits, then stores the message
+    try:
+        turn = engine.start_turn(session, user_input)
+    except RateLimited as e:
+        turn = None
+        wait = e.eta
+
+    if turn is None:
+        # The message was not recorded; it stays in the input box to send again
+        st.toast(f"Too many messages at once, I can answer again in {wait:.0f}s", icon="⏳")
+        return
+    elif turn.cached_reply is not None:
+        engine.finish(turn, turn.cached_reply, timestamp=datetime.now().strftime("%H:%M"))
+    elif st.session_state.stream_responses:
+        # Show the message being answered, then fill the assistant bubble token by token
+        st.markdown(bubble_html("user", "👤 You", user_input), unsafe_allow_html=True)
+        reply_placeholder = st.empty()
+        reply_placeholder.markdown(bubble_html("assistant", assistant_label, "💭 ..."), unsafe_allow_html=True)
+
+        parts = []
+        try:
+            tokens = queue.Queue()
+            ticket = engine.stream(turn, tokens)
+            while True:
+                try:
+                    token = tokens.get(timeout=0.25)
+                except queue.Empty:
+                    if not ticket.started.is_set():
+                        reply_placeholder.markdown(
+                            bubble_html("assistant", assistant_label, queue_status(ticket.position(), ticket.eta())),
+                            unsafe_allow_html=True)
+                    continue
+                if token is None:
+                    break
+                parts.append(token)
+                reply_placeholder.markdown(bubble_html("assistant", assistant_label, "".join(parts) + "▌"),
+                                           unsafe_allow_html=True)
+            answered_by = ticket.result()  # Re-raise anything that went wrong inside the job
+            note_fallback(model, answered_by)
+
+            # Commit the finished reply only once the stream is complete
+            reply = engine.finish(turn, "".join(parts), answered_by, timestamp=datetime.now().strftime("%H:%M"))
+            st.session_state.last_ttft = reply.get("ttft")
+
+        except Exception as e:
+            engine.abandon(turn, "".join(parts))
+            st.error(f"❌ Error: {str(e)}")
+            assistant_response = "Sorry, I encountered an error. Please try again."
+            st.session_state.messages.append({"role": "assistant", "content": assistant_response})
+    else:
+        # Show human-like typing indicator
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        status_text.text(random.choice(TYPING_MESSAGES))
+
+        try:
+            # Optimize API call with faster settings
+            ticket = engine.request(turn)
+            chat_completion, answered_by = ticket.wait(
+                on_wait=lambda position: status_text.text(queue_status(position, ticket.eta())))
+            note_fallback(model, answered_by)
+            assistant_response = chat_completion.choices[0].message.content
+
+            # Update progress
+            progress_bar.progress(100)
+            status_text.text(random.choice(RESPONSE_VARIATIONS))
+
+            # Add timestamp
+            timestamp = datetime.now().strftime("%H:%M")
+            engine.finish(turn, assistant_response, answered_by, usage=chat_completion.usage, timestamp=timestamp)
+
+        except Exception as e:
+            engine.abandon(turn)
+            st.error(f"❌ Error: {str(e)}")
+            assistant_response = "Sorry, I encountered an error. Please try again."
+            st.session_state.messages.append({"role": "assistant", "content": assistant_response})
+
+    # Set flag to clear the input on next rerun
+    st.session_state["clear_input"] = clear_input
+    st.rerun()
+
+
+def render():
+    # Initialize Groq client (one per process, so reruns reuse its HTTP connections)
+    try:
+        api_key = st.secrets["GROQ_API_KEY"]
+        client = get_client(api_key)
+    except:
+        st.error("❌ API key not found. Please check your secrets.toml file.")
+        st.stop()
+
+    # Completions run on the shared scheduler and retry, hedge and fall back to faster models.
+    # Every session shares one API key, so requests are paced per user and for the key as a whole
+    limiter = get_limiter(api_key)
+    engine = ChatEngine(client, limiter=limiter)
+    # The chat pipeline reads its fields straight from st.session_state
+    session = ChatSession(st.session_state)
+    # Chatbot persona for this session; cached, so reruns and renders reuse it
+    persona = session.persona()
+
+    # Top navigation bar with hamburger menu
+    col1, col2, col3 = st.columns([1, 3, 1])
+
+    with col1:
+        if st.button("☰", help="Menu"):
+            st.session_state.show_menu = not st.session_state.get('show_menu', False)
+
+    with col2:
+        # Main header in center
+        if persona.name:
+            st.markdown(f'<h2 style="text-align: center; margin: 0;">{persona.label}</h2>', unsafe_allow_html=True)
+        else:
+            st.markdown('<h2 style="text-align: center; margin: 0;">🤖 AI Chat Assistant</h2>', unsafe_allow_html=True)
+
+    with col3:
+        if st.button("⚙️", help="Settings"):
+            st.session_state.show_settings = not st.session_state.get('show_settings', False)
+
+    # Menu panel (appears when hamburger is clicked)
+    if st.session_state.get('show_menu', False):
+        _menu(persona, engine, limiter)
+
+    # Settings panel (appears when settings is clicked)
+    if st.session_state.get('show_settings', False):
+        _settings()
+
+    # Main chat interface - clean and minimal like Gemini
+    st.markdown("<br>", unsafe_allow_html=True)
+    _transcript(engine, session, persona)
+
+    # Chat input with enhanced features - centered like Gemini
+    st.markdown("<br><br><br><br>", unsafe_allow_html=True)  # Add space for fixed input
+
+    # Fixed bottom input container
+    st.markdown('<div class="input-container">', unsafe_allow_html=True)
+    col1, col2, col3 = st.columns([1, 3, 1])
+
+    # --- Input clearing logic ---
+    input_value = ""
+    if st.session_state.get("clear_input", False):
+        input_value = ""
+        st.session_state["clear_input"] = False
+    else:
+        input_value = st.session_state.get("chat_input", "")
+
+    with col2:
+        user_input = st.text_input(
+            "\U0001F4AC Your message:",
+            placeholder="Type your message here...",
+            label_visibility="collapsed",
+            key="chat_input",
+            value=input_value
+        )
+        send_button = st.button("\U0001F680 Send", use_container_width=True, key="send_button")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Only send message if send_button is pressed
+    if send_button and user_input.strip():
+        _send(engine, session, user_input)
+    elif st.session_state.get("pending_starter"):
+        # A picked starter is sent like a typed message, leaving any draft in the input box
+        _send(engine, session, st.session_state.pop("pending_starter"), clear_input=False)
+
+    # Footer - minimal
+    st.markdown("""
+<div style='text-align: center; color: #999; padding: 1rem; font-size: 0.8rem;'>
+    <p>🤖 Powered by Groq AI • Model: {}</p>
+</div>
+""".format(st.session_state.model), unsafe_allow_html=True)
@@ -0,0 +1,69 @@
+"""Login form, with a demo login that skips the database"""
+import streamlit as st
+
+from accounts import update_last_login, verify_user
+from flash import flash
+from sessions import sessions
+from views import assets_html
+from views.auth import SESSION_PARAM, load_history, save_session_data
+
+
+def render():
+    st.markdown(assets_html("login.css", "enter_key.js"), unsafe_allow_html=True)
+    
+    st.markdown('<div class="login-container">', unsafe_allow_html=True)
+    st.markdown('<div class="login-header"><h2>🔐 Login</h2><p>Welcome back to AI Chat Assistant</p></div>', unsafe_allow_html=True)
+    
+    with st.form("login_form"):
+        username = st.text_input("👤 Username", placeholder="Enter your username")
+        password = st.text_input("🔒 Password", type="password", placeholder="Enter your password")
+        remember_me = st.checkbox("Remember me", value=st.session_state.remember_me)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            login_button = st.form_submit_button("🚀 Login", use_container_width=True)
+        with col2:
+            if st.form_submit_button("🔄 Demo Login", use_container_width=True):
+                st.session_state.demo_mode = True
+                st.session_state.logged_in = True
+                st.session_state.username = "Demo User"
+                st.session_state.user_id = 0  # Demo user ID
+                st.session_state.remember_me = True
+                st.session_state.user_gender = "Prefer not to say"
+                st.session_state.chatbot_name = "Alex"
+                st.session_state.chatbot_gender = "Non-binary"
+                save_session_data()
+                st.rerun()
+    
+    if login_button and username and password:
+        user = verify_user(username, password)
+        if user:
+            flash(f"Welcome back, {user.username}!", icon="✅")
+            update_last_login(user.id)
+            st.session_state.logged_in = True
+            st.session_state.username = user.username
+            st.session_state.user_id = user.id
+            st.session_state.remember_me = remember_me
+            st.session_state.user_gender = user.gender
+            
+            # Load chatbot preferences
+            st.session_state.chatbot_name = user.chatbot_name
+            st.session_state.chatbot_gender = user.chatbot_gender
+            load_history()
+            
+            # Save session data for persistence
+            if remember_me:
+                st.query_params[SESSION_PARAM] = sessions.create(user.id, user.username)
+            save_session_data()
+            st.rerun()
+        else:
+            st.error("❌ Invalid username or password")
+    
+    st.markdown('<div class="signup-link">', unsafe_allow_html=True)
+    st.markdown("Don't have an account?")
+    if st.button("📝 Sign Up", key="go_to_signup"):
+        st.session_state.page = "signup"
+        st.rerun()
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,123 @@
+"""Signup form with chatbot preferences"""
+import re
+
+import streamlit as st
+
+from accounts import AccountExists, create_user
+from flash import flash
+from persona import gender_emoji, resolve_gender
+from views import assets_html
+
+
+def validate_email(email):
+    """Validate email format"""
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return re.match(pattern, email) is not None
+
+
+def validate_password(password):
+    """Validate password strength"""
+    if len(password) < 8:
+        return False, "Password must be at least 8 characters long"
+    if not re.search(r'[A-Z]', password):
+        return False, "Password must contain at least one uppercase letter"
+    if not re.search(r'[a-z]', password):
+        return False, "Password must contain at least one lowercase letter"
+    if not re.search(r'\d', password):
+        return False, "Password must contain at least one number"
+    return True, "Password is strong"
+
+
+def render():
+    st.markdown(assets_html("signup.css", "enter_key.js"), unsafe_allow_html=True)
+    
+    st.markdown('<div class="signup-container">', unsafe_allow_html=True)
+    st.markdown('<div class="signup-header"><h2>📝 Sign Up</h2><p>Create your AI Chat Assistant account</p></div>', unsafe_allow_html=True)
+    
+    with st.form("signup_form"):
+        username = st.text_input("👤 Username", placeholder="Choose a username")
+        email = st.text_input("📧 Email", placeholder="Enter your email")
+        
+        # Gender selection
+        gender = st.selectbox(
+            "👥 Gender",
+            options=["", "Male", "Female", "Non-binary", "Prefer not to say"],
+            placeholder="Select your gender"
+        )
+        
+        st.markdown("### 🤖 Chatbot Preferences")
+        
+        # Chatbot name
+        chatbot_name = st.text_input("💬 Chatbot Name", placeholder="Give your AI assistant a name")
+        
+        # Chatbot gender preference
+        chatbot_gender = st.selectbox(
+            "👥 Chatbot Gender",
+            options=["", "Male", "Female", "Non-binary", "Same as me", "Opposite of me"],
+            placeholder="Choose your chatbot's gender"
+        )
+        
+        # Show preview of chatbot personality
+        if chatbot_name and chatbot_gender:
+            preview_gender = resolve_gender(chatbot_gender, gender)
+            st.info(f"🤖 Your AI assistant will be: **{chatbot_name}** {gender_emoji(preview_gender)} ({preview_gender})")
+        
+        password = st.text_input("🔒 Password", type="password", placeholder="Create a password")
+        confirm_password = st.text_input("🔒 Confirm Password", type="password", placeholder="Confirm your password")
+        
+        # Password strength indicator
+        if password:
+            is_valid, message = validate_password(password)
+            if is_valid:
+                st.markdown(f'<div class="password-strength strength-strong">✅ {message}</div>', unsafe_allow_html=True)
+            else:
+                st.markdown(f'<div class="password-strength strength-weak">❌ {message}</div>', unsafe_allow_html=True)
+        
+        terms_accepted = st.checkbox("I agree to the Terms of Service and Privacy Policy")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            signup_button = st.form_submit_button("🚀 Create Account", use_container_width=True)
+        with col2:
+            if st.form_submit_button("🔙 Back to Login", use_container_width=True):
+                st.session_state.page = "login"
+                st.rerun()
+    
+    if signup_button:
+        # Validation
+        if not username or not email or not password or not confirm_password:
+            st.error("❌ Please fill in all required fields")
+        elif not gender:
+            st.error("❌ Please select your gender")
+        elif not chatbot_name:
+            st.error("❌ Please give your chatbot a name")
+        elif not chatbot_gender:
+            st.error("❌ Please select your chatbot's gender")
+        elif not validate_email(email):
+            st.error("❌ Please enter a valid email address")
+        elif not validate_password(password)[0]:
+            st.error(f"❌ {validate_password(password)[1]}")
+        elif password != confirm_password:
+            st.error("❌ Passwords do not match")
+        elif not terms_accepted:
+            st.error("❌ Please accept the terms and conditions")
+        else:
+            # Create user; the unique indexes reject taken usernames and emails
+            try:
+                create_user(username, email, password, gender, chatbot_name, chatbot_gender)
+                flash("Account created successfully! You can now login with your credentials", icon="✅")
+                st.session_state.page = "login"
+                st.rerun()
+            except AccountExists as e:
+                st.error("❌ Username already exists" if e.field == "username" else "❌ Email already registered")
+            except Exception as e:
+                st.error(f"❌ Error creating account: {str(e)}")
+    
+    st.markdown('<div class="login-link">', unsafe_allow_html=True)
+    st.markdown("Already have an account?")
+    if st.button("🔐 Login", key="go_to_login"):
+        st.session_state.page = "login"
+        st.rerun()
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    st.markdown('</div>', unsafe_allow_html=True)